@@ -0,0 +1,173 @@
+import os
+import json
+import zlib
+import time
+import random
+import struct
+import argparse
+from itertools import accumulate
+from concurrent.futures import ProcessPoolExecutor
+
+SYLLABLES = [consonant + vowel for consonant in "bdfgklmnprstvz" for vowel in "aeiou"]
+PUNCTUATION = (".", ".", ".", ",", "!", "?")
+
+_tables = {}
+
+def _word(rank):
+    parts = []
+    n = rank + 1
+    while n:
+        n, remainder = divmod(n - 1, len(SYLLABLES))
+        parts.append(SYLLABLES[remainder])
+    return "".join(parts)
+
+def _zipf_weights(size, exponent):
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, size + 1)))
+
+def _init_tables(vocabulary_size, tag_vocabulary_size, exponent):
+    _tables["words"] = [_word(rank) for rank in range(vocabulary_size)]
+    _tables["word_weights"] = _zipf_weights(vocabulary_size, exponent)
+    _tables["tags"] = [_word(rank).capitalize() for rank in range(tag_vocabulary_size)]
+    _tables["tag_weights"] = _zipf_weights(tag_vocabulary_size, exponent)
+
+def _sentences(rng, word_count):
+    words = rng.choices(_tables["words"], cum_weights=_tables["word_weights"], k=word_count)
+    sentences = []
+    position = 0
+    while position < len(words):
+        length = rng.randint(6, 18)
+        sentence = words[position:position + length]
+        sentence[0] = sentence[0].capitalize()
+        sentences.append(" ".join(sentence) + rng.choice(PUNCTUATION))
+        position += length
+    return sentences
+
+def _page(rng, url, title, word_count, tag_count, link_urls):
+    sentences = _sentences(rng, rng.randint(max(1, word_count // 2), max(1, word_count * 3 // 2)))
+    tags = []
+    while len(tags) < tag_count and len(tags) < len(_tables["tags"]):
+        tag = rng.choices(_tables["tags"], cum_weights=_tables["tag_weights"])[0]
+        if tag not in tags:
+            tags.append(tag)
+
+    markup = [f"<t> {title} ; size 18 bold :"]
+    markup += [f"<t> {sentence} ; :" for sentence in sentences[:5]]
+    markup += [f"<a> {link_url} ; href {link_url} :" for link_url in link_urls]
+    return {
+        "url": url,
+        "tags": tags,
+        "content": " ".join(sentences),
+        "source_code": {"background_color": "#FFFFFF", "markup": markup}
+    }
+
+def _write_pages(folder, kind, start, end, seed, words, tags, total_pages):
+    for number in range(start, end):
+        rng = random.Random(f"{seed}:{kind}:{number}")
+        if kind == "wiki":
+            title = _tables["words"][rng.randrange(len(_tables["words"]))].capitalize()
+            url = f"maxipedia.com/{title}{number}"
+        else:
+            title = f"Site {number}"
+            url = f"site{number}.com"
+        link_urls = [f"site{rng.randrange(total_pages)}.com" for _ in range(3)] if total_pages else []
+        page = _page(rng, url, title, words, tags, link_urls)
+        with open(os.path.join(folder, f"{kind}{number}.json"), "w") as f:
+            json.dump(page, f)
+    return end - start
+
+def _png(width, height, color):
+    row = b"\x00" + bytes(color) * width
+    chunks = []
+    for chunk_type, data in (
+        (b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+        (b"IDAT", zlib.compress(row * height, 9)),
+        (b"IEND", b"")
+    ):
+        chunks.append(struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data)))
+    return b"\x89PNG\r\n\x1a\n" + b"".join(chunks)
+
+def _write_images(folder, count, seed):
+    rng = random.Random(f"{seed}:images")
+    for number in range(count):
+        width, height = rng.randint(64, 640), rng.randint(64, 480)
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        with open(os.path.join(folder, f"image{number}.png"), "wb") as f:
+            f.write(_png(width, height, color))
+
+def generate_corpus(output, pages, wiki_pages, vocabulary=50000, exponent=1.1, words=150, wiki_words=800,
+                    tags=3, tag_vocabulary=200, images=100, seed=1, workers=None):
+    websites_folder = os.path.join(output, "websites")
+    wiki_folder = os.path.join(websites_folder, "maxipedia")
+    images_folder = os.path.join(output, "images", "bench")
+    for folder in (websites_folder, wiki_folder, images_folder):
+        os.makedirs(folder, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    jobs = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_tables, initargs=(vocabulary, tag_vocabulary, exponent)) as executor:
+        for folder, kind, count, word_count in (
+            (websites_folder, "site", pages, words),
+            (wiki_folder, "wiki", wiki_pages, wiki_words)
+        ):
+            chunk = max(1, min(10000, count // (workers * 4) or 1))
+            for start in range(0, count, chunk):
+                jobs.append(executor.submit(_write_pages, folder, kind, start, min(count, start + chunk), seed, word_count, tags, pages))
+        written = sum(job.result() for job in jobs)
+    _write_images(images_folder, images, seed)
+
+    return {
+        "output": os.path.abspath(output),
+        "pages": pages,
+        "wiki_pages": wiki_pages,
+        "vocabulary": vocabulary,
+        "zipf_exponent": exponent,
+        "words": words,
+        "wiki_words": wiki_words,
+        "tags": tags,
+        "tag_vocabulary": tag_vocabulary,
+        "images": images,
+        "seed": seed,
+        "files_written": written,
+        "seconds": time.perf_counter() - started
+    }
+
+def add_corpus_arguments(parser):
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--wiki-pages", type=int)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--zipf-exponent", type=float, default=1.1)
+    parser.add_argument("--words", type=int, default=150)
+    parser.add_argument("--wiki-words", type=int, default=800)
+    parser.add_argument("--tags", type=int, default=3)
+    parser.add_argument("--tag-vocabulary", type=int, default=200)
+    parser.add_argument("--images", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int)
+
+def corpus_options(args):
+    return {
+        "pages": args.pages,
+        "wiki_pages": args.wiki_pages if args.wiki_pages is not None else max(1, args.pages // 10),
+        "vocabulary": args.vocabulary,
+        "exponent": args.zipf_exponent,
+        "words": args.words,
+        "wiki_words": args.wiki_words,
+        "tags": args.tags,
+        "tag_vocabulary": args.tag_vocabulary,
+        "images": args.images,
+        "seed": args.seed,
+        "workers": args.workers
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic websites/ and images/ tree for server.py.")
+    parser.add_argument("--output", required=True)
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    result = generate_corpus(args.output, **corpus_options(args))
+    print(f"Wrote {result['files_written']} pages to {result['output']} in {result['seconds']:.1f}s")
+
+if __name__ == "__main__":
+    main()
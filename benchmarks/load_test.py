@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import time
+import re
+import random
+import argparse
+import threading
+import requests
+
+def _percentile(sorted_values, percentile):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def _route(path):
+    return "/" + path.split("/")[1]
+
+def _summary(latencies):
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "latency_ms": {
+            "p50": _percentile(latencies, 50) * 1000,
+            "p95": _percentile(latencies, 95) * 1000,
+            "p99": _percentile(latencies, 99) * 1000,
+        }
+    }
+
+def _discover_paths(base_url, headers, sample_size, images_directory=None):
+    response = requests.get(f"{base_url}/search/", headers=headers, params={"limit": sample_size})
+    response.raise_for_status()
+    urls = [result["url"] for result in response.json()]
+
+    words = []
+    for result in response.json():
+        words.extend(re.sub(r"[^\w\s]", "", result.get("snippet") or result.get("content") or "").lower().split()[:3])
+
+    paths = [f"/website/{url}" for url in urls]
+    paths += [f"/search/{word}?limit=10" for word in words[:sample_size]]
+    paths += [f"/wiki_search/{word}?limit=10" for word in words[:sample_size]]
+
+    if images_directory:
+        response = requests.get(f"{base_url}/list_images/{images_directory}", headers=headers, params={"limit": sample_size})
+        if response.status_code == 200:
+            for image in response.json():
+                paths.append(f"/images/{images_directory}/{image['name']}")
+                paths.append(f"/images/{images_directory}/{image['name']}?width=160")
+    return paths
+
+def _worker(base_url, headers, paths, deadline, latencies, route_latencies, errors, shed, lock):
+    session = requests.Session()
+    session.headers.update(headers)
+    local_latencies = []
+    local_routes = {}
+    local_errors = 0
+    local_shed = 0
+
+    while time.perf_counter() < deadline:
+        path = random.choice(paths)
+        started = time.perf_counter()
+        try:
+            response = session.get(f"{base_url}{path}")
+            response.content
+            if response.status_code in (429, 503) and "Retry-After" in response.headers:
+                local_shed += 1
+            elif response.status_code >= 500:
+                local_errors += 1
+        except requests.exceptions.RequestException:
+            local_errors += 1
+            continue
+        latency = time.perf_counter() - started
+        local_latencies.append(latency)
+        local_routes.setdefault(_route(path), []).append(latency)
+
+    with lock:
+        latencies.extend(local_latencies)
+        for route, values in local_routes.items():
+            route_latencies.setdefault(route, []).extend(values)
+        errors.append(local_errors)
+        shed.append(local_shed)
+
+def run_load_test(base_url, key, duration, concurrency, sample_size=50, images_directory=None):
+    headers = {"X-API-Key": key}
+    paths = _discover_paths(base_url, headers, sample_size, images_directory)
+    if not paths:
+        raise RuntimeError("The server returned no pages to request")
+
+    latencies = []
+    route_latencies = {}
+    errors = []
+    shed = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=_worker, args=(base_url, headers, paths, deadline, latencies, route_latencies, errors, shed, lock))
+        for _ in range(concurrency)
+    ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "server": base_url,
+        "duration": elapsed,
+        "concurrency": concurrency,
+        "errors": sum(errors),
+        "shed": sum(shed),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+    }
+    result.update(_summary(latencies))
+    result["routes"] = {route: _summary(values) for route, values in sorted(route_latencies.items())}
+    return result
+
+def print_result(result):
+    print(f"{result['requests']} requests in {result['duration']:.1f}s ({result['errors']} errors, {result['shed']} shed)")
+    print(f"Throughput: {result['throughput']:.0f} req/s")
+    print("Latency: p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms".format(**result["latency_ms"]))
+    for route, summary in result["routes"].items():
+        print(f"  {route:<13} {summary['requests']:>7} requests, " + "p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms".format(**summary["latency_ms"]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure throughput and latency of a running server.py instance.")
+    parser.add_argument("--server", default="http://127.0.0.1:5000")
+    parser.add_argument("--key", default=os.environ.get("SERVER_KEY", ""))
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--images", help="Image directory below images/ to include in the mix")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    try:
+        result = run_load_test(args.server.rstrip("/"), args.key, args.duration, args.concurrency, images_directory=args.images)
+    except (requests.exceptions.RequestException, RuntimeError) as e:
+        print(f"Load test failed: {e}")
+        sys.exit(1)
+
+    print_result(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import re
+import json
+import gc
+import argparse
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+def _load_legacy_layout(websites_folder):
+    datasets = []
+    for folder in (websites_folder, os.path.join(websites_folder, "maxipedia")):
+        dataset = {}
+        if os.path.isdir(folder):
+            for website_file in os.listdir(folder):
+                filepath = os.path.join(folder, website_file)
+                if not os.path.isfile(filepath):
+                    continue
+                try:
+                    with open(filepath, "r") as f:
+                        website_content = json.load(f)
+                except (json.JSONDecodeError, KeyError):
+                    continue
+
+                url = website_content.get("url")
+                if url:
+                    cleaned_content = re.sub(r'[^\w\s]', '', website_content.get("content", "").lower())
+                    dataset[url] = {
+                        "tags": [tag.lower() for tag in website_content.get("tags", [])],
+                        "content_words": cleaned_content.split(),
+                        "content": website_content.get("content"),
+                        "source_code": website_content.get("source_code")
+                    }
+
+        index = {"urls": list(dataset.keys()), "tags": {}, "content": {}}
+        for doc_id, data in enumerate(dataset.values()):
+            for field, terms in (("tags", data["tags"]), ("content", data["content_words"])):
+                for term in terms:
+                    postings = index[field].setdefault(term, {})
+                    postings[doc_id] = postings.get(doc_id, 0) + 1
+        datasets.append((dataset, index))
+    return datasets
+
+def _load_compact_layout(server, websites_folder):
+    websites, _ = server._refresh_collection(None, websites_folder, "file")
+    wiki, _ = server._refresh_collection(None, os.path.join(websites_folder, "maxipedia"), "wiki file")
+    return websites, wiki
+
+def measure(layout, websites_folder):
+    if layout == "compact":
+        import server
+        server.TERMS = []
+        server.TERM_IDS = {}
+
+    gc.collect()
+    tracemalloc.start()
+    if layout == "legacy":
+        corpus = _load_legacy_layout(websites_folder)
+    else:
+        corpus = _load_compact_layout(server, websites_folder)
+
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del corpus
+    return {"layout": layout, "current_bytes": current, "peak_bytes": peak}
+
+def _corpus_size_on_disk(websites_folder):
+    total = 0
+    for folder in (websites_folder, os.path.join(websites_folder, "maxipedia")):
+        if os.path.isdir(folder):
+            with os.scandir(folder) as entries:
+                total += sum(entry.stat().st_size for entry in entries if entry.is_file())
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare resident corpus memory of the legacy and compact page layouts.")
+    parser.add_argument("--websites", default=os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "websites")))
+    parser.add_argument("--layout", choices=["legacy", "compact"])
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    websites_folder = os.path.abspath(args.websites)
+
+    if args.layout:
+        print(json.dumps(measure(args.layout, websites_folder)))
+        return
+
+    results = {"websites": websites_folder, "disk_bytes": _corpus_size_on_disk(websites_folder)}
+    for layout in ("legacy", "compact"):
+        completed = subprocess.run(
+            [sys.executable, __file__, "--layout", layout, "--websites", websites_folder],
+            capture_output=True, text=True, check=True
+        )
+        results[layout] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    legacy_bytes = results["legacy"]["current_bytes"]
+    compact_bytes = results["compact"]["current_bytes"]
+    print(f"Corpus on disk: {results['disk_bytes'] / 1e6:.1f} MB")
+    print(f"Legacy layout:  {legacy_bytes / 1e6:.1f} MB")
+    print(f"Compact layout: {compact_bytes / 1e6:.1f} MB ({compact_bytes / legacy_bytes:.0%} of legacy)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
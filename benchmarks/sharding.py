@@ -0,0 +1,148 @@
+import os
+import re
+import sys
+import json
+import secrets
+import argparse
+import tempfile
+import requests
+
+from .corpus import generate_corpus, add_corpus_arguments, corpus_options
+from .load_test import run_load_test, print_result
+from .suite import prepare_workdir, write_server_config, start_server, stop_server, process_tree_rss
+
+def _sample_words(base_url, headers, count):
+    response = requests.get(f"{base_url}/search/", headers=headers, params={"limit": count})
+    response.raise_for_status()
+    words = []
+    for result in response.json():
+        words.extend(re.sub(r"[^\w\s]", "", result["snippet"]).lower().split()[:2])
+    return list(dict.fromkeys(words))[:count], [result["url"] for result in response.json()]
+
+def _search(base_url, headers, path, params):
+    response = requests.get(f"{base_url}{path}", headers=headers, params=dict(params, scores="1"))
+    if response.status_code == 404:
+        return 0, []
+    response.raise_for_status()
+    return int(response.headers["X-Total-Count"]), response.json()
+
+def _same_ranking(expected, actual):
+    if len(expected) != len(actual):
+        return False
+    if any(abs(left["score"] - right["score"]) > 1e-9 for left, right in zip(expected, actual)):
+        return False
+    if not expected:
+        return True
+    boundaries = (expected[0]["score"], expected[-1]["score"])
+    untied = lambda results: {
+        result["url"] for result in results
+        if all(abs(result["score"] - boundary) > 1e-9 for boundary in boundaries)
+    }
+    return untied(expected) == untied(actual)
+
+def compare(single_url, coordinator_url, headers, queries):
+    words, urls = _sample_words(single_url, headers, queries)
+    mismatches = []
+    checked = 0
+    for word in words + [f"{words[0]} {words[-1]}"] if words else []:
+        for path in (f"/search/{word}", f"/wiki_search/{word}"):
+            for params in ({"limit": 10}, {"limit": 10, "rank": "bm25"}, {"limit": 5, "offset": 5, "rank": "bm25"}):
+                expected_total, expected = _search(single_url, headers, path, params)
+                actual_total, actual = _search(coordinator_url, headers, path, params)
+                checked += 1
+                if expected_total != actual_total or not _same_ranking(expected, actual):
+                    mismatches.append({"path": path, "params": params, "expected": expected_total, "actual": actual_total})
+
+    for url in urls:
+        checked += 1
+        expected = requests.get(f"{single_url}/website/{url}", headers=headers)
+        actual = requests.get(f"{coordinator_url}/website/{url}", headers=headers)
+        if expected.status_code != actual.status_code or expected.json() != actual.json():
+            mismatches.append({"path": f"/website/{url}"})
+    return {"checked": checked, "mismatches": mismatches}
+
+def run_sharding(args):
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="server-shards-"))
+    os.makedirs(workdir, exist_ok=True)
+    key = secrets.token_hex(16)
+    headers = {"X-API-Key": key}
+
+    corpus = None
+    if args.corpus is None:
+        print(f"Generating corpus in {workdir}...")
+        corpus = generate_corpus(workdir, **corpus_options(args))
+    prepare_workdir(workdir, args.corpus, args.base_port, key)
+
+    single_url = f"http://127.0.0.1:{args.base_port}"
+    shard_urls = [f"http://127.0.0.1:{args.base_port + 1 + shard}" for shard in range(args.shards)]
+    coordinator_port = args.base_port + 1 + args.shards
+    coordinator_url = f"http://127.0.0.1:{coordinator_port}"
+
+    configs = []
+    for shard, shard_url in enumerate(shard_urls):
+        path = os.path.join(workdir, f"shard{shard}.json")
+        write_server_config(path, key, args.base_port + 1 + shard, shard={"index": shard, "count": args.shards})
+        configs.append((shard_url, path))
+    coordinator_config = os.path.join(workdir, "coordinator.json")
+    write_server_config(coordinator_config, key, coordinator_port, shards=shard_urls, shard_timeout=args.shard_timeout)
+
+    result = {"workdir": workdir, "shards": args.shards, "corpus": corpus or {"output": os.path.abspath(args.corpus)}}
+    processes = []
+    with open(os.path.join(workdir, "server.log"), "w") as log:
+        try:
+            process, seconds = start_server(workdir, single_url, key, False, args.startup_timeout, log)
+            processes.append(process)
+            result["single"] = {"startup_seconds": seconds, "rss_bytes": process_tree_rss(process.pid)}
+
+            result["shard_nodes"] = []
+            for shard_url, path in configs:
+                process, seconds = start_server(workdir, shard_url, key, False, args.startup_timeout, log, ["--config", path])
+                processes.append(process)
+                result["shard_nodes"].append({"url": shard_url, "startup_seconds": seconds, "rss_bytes": process_tree_rss(process.pid)})
+
+            process, seconds = start_server(workdir, coordinator_url, key, False, args.startup_timeout, log, ["--config", coordinator_config])
+            processes.append(process)
+            result["coordinator"] = {"startup_seconds": seconds, "rss_bytes": process_tree_rss(process.pid)}
+
+            result["comparison"] = compare(single_url, coordinator_url, headers, args.queries)
+            print(f"Compared {result['comparison']['checked']} requests, {len(result['comparison']['mismatches'])} mismatches")
+
+            if args.duration > 0:
+                for label, url in (("single", single_url), ("coordinator", coordinator_url)):
+                    print(f"\n{label}:")
+                    result[label]["load"] = run_load_test(url, key, args.duration, args.concurrency)
+                    print_result(result[label]["load"])
+        finally:
+            for process in processes:
+                stop_server(process)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=4)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a coordinator over several local shard processes and compare it with a single server.")
+    parser.add_argument("--workdir")
+    parser.add_argument("--corpus", help="Reuse a directory containing websites/ and images/ instead of generating one")
+    parser.add_argument("--shards", type=int, default=3)
+    parser.add_argument("--base-port", type=int, default=5100)
+    parser.add_argument("--shard-timeout", type=float, default=2.0)
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=0.0, help="Seconds of load per server; 0 skips the load test")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        result = run_sharding(args)
+    except (requests.exceptions.RequestException, RuntimeError) as e:
+        print(f"Sharding check failed: {e}")
+        sys.exit(1)
+    if result["comparison"]["mismatches"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
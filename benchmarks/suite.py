@@ -0,0 +1,187 @@
+import os
+import sys
+import json
+import time
+import shutil
+import secrets
+import argparse
+import tempfile
+import platform
+import subprocess
+import requests
+
+from .corpus import generate_corpus, add_corpus_arguments, corpus_options
+from .load_test import run_load_test, print_result
+
+try:
+    import psutil
+    RSS_ERRORS = (OSError, ValueError, psutil.Error)
+except ImportError:
+    psutil = None
+    RSS_ERRORS = (OSError, ValueError)
+
+SERVER_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "server.py"))
+
+def _proc_rss_bytes(pid):
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        with open(f"/proc/{current}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1]) * 1024
+                    break
+        for task in os.listdir(f"/proc/{current}/task"):
+            with open(f"/proc/{current}/task/{task}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+    return total
+
+def process_tree_rss(pid):
+    try:
+        if psutil is not None:
+            process = psutil.Process(pid)
+            return sum(member.memory_info().rss for member in [process] + process.children(recursive=True))
+        return _proc_rss_bytes(pid)
+    except RSS_ERRORS:
+        return None
+
+def write_server_config(path, key, port, **options):
+    server_config = {
+        "key": key,
+        "port": port,
+        "debug": False,
+        "access_log": "",
+        "production": {"bind": f"127.0.0.1:{port}"}
+    }
+    server_config.update(options)
+    with open(path, "w") as f:
+        json.dump(server_config, f, indent=4)
+
+def prepare_workdir(workdir, corpus, port, key):
+    if corpus:
+        for name in ("websites", "images"):
+            target = os.path.join(workdir, name)
+            if not os.path.exists(target) and os.path.isdir(os.path.join(corpus, name)):
+                os.symlink(os.path.abspath(os.path.join(corpus, name)), target)
+
+    shutil.copy(SERVER_PATH, os.path.join(workdir, "server.py"))
+    for stale in ["image_cache"] + [name for name in os.listdir(workdir) if name.startswith("corpus.") and ".snapshot" in name]:
+        path = os.path.join(workdir, stale)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    write_server_config(os.path.join(workdir, "server_config.json"), key, port)
+
+def start_server(workdir, base_url, key, production, timeout, log, arguments=()):
+    command = [sys.executable, "server.py"] + (["--production"] if production else []) + list(arguments)
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=workdir, stdout=log, stderr=subprocess.STDOUT)
+    deadline = started + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}, see {log.name}")
+        try:
+            response = requests.get(f"{base_url}/search/", headers={"X-API-Key": key}, params={"limit": 1}, timeout=1)
+            if response.status_code == 200:
+                return process, time.perf_counter() - started
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.05)
+
+    stop_server(process)
+    raise RuntimeError(f"Server did not answer within {timeout}s, see {log.name}")
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def _git_revision():
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(SERVER_PATH),
+            capture_output=True, text=True, check=True
+        )
+        return completed.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(args):
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="server-benchmark-"))
+    os.makedirs(workdir, exist_ok=True)
+    key = secrets.token_hex(16)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    corpus = None
+    if args.corpus is None:
+        print(f"Generating corpus in {workdir}...")
+        corpus = generate_corpus(workdir, **corpus_options(args))
+        print(f"Wrote {corpus['files_written']} pages in {corpus['seconds']:.1f}s")
+    prepare_workdir(workdir, args.corpus, args.port, key)
+
+    result = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "workdir": workdir,
+        "mode": "production" if args.production else "development",
+        "corpus": corpus or {"output": os.path.abspath(args.corpus)},
+        "server": {}
+    }
+
+    with open(os.path.join(workdir, "server.log"), "w") as log:
+        process, cold_seconds = start_server(workdir, base_url, key, args.production, args.startup_timeout, log)
+        stop_server(process)
+        print(f"Cold start (parse corpus, write snapshot): {cold_seconds:.2f}s")
+
+        process, warm_seconds = start_server(workdir, base_url, key, args.production, args.startup_timeout, log)
+        try:
+            result["server"]["startup_seconds"] = {"cold": cold_seconds, "warm": warm_seconds}
+            result["server"]["rss_bytes_idle"] = process_tree_rss(process.pid)
+            print(f"Warm start (load snapshot): {warm_seconds:.2f}s")
+
+            load = run_load_test(base_url, key, args.duration, args.concurrency, images_directory="bench")
+            result["server"]["rss_bytes_loaded"] = process_tree_rss(process.pid)
+            result["load"] = load
+        finally:
+            stop_server(process)
+
+    print_result(result["load"])
+    for label, field in (("idle", "rss_bytes_idle"), ("after load", "rss_bytes_loaded")):
+        if result["server"][field] is not None:
+            print(f"RSS {label}: {result['server'][field] / 1e6:.1f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=4)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic corpus, start server.py on it and load test it.")
+    parser.add_argument("--workdir", help="Directory for the corpus, server copy and log (default: a new temporary directory)")
+    parser.add_argument("--corpus", help="Reuse a directory containing websites/ and images/ instead of generating one")
+    parser.add_argument("--production", action="store_true", help="Run the server with --production (requires gunicorn)")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        run_suite(args)
+    except (requests.exceptions.RequestException, RuntimeError) as e:
+        print(f"Benchmark failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
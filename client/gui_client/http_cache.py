@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024
+DEFAULT_DISK_BYTES = 256 * 1024 * 1024
+STORED_HEADERS = ("Content-Type", "ETag", "Cache-Control", "Last-Modified", "Vary", "X-Total-Count")
+
+def _cache_control(headers):
+    directives = {}
+    for part in headers.get("Cache-Control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    return directives
+
+def _max_age(directives):
+    if "no-cache" in directives:
+        return 0
+    try:
+        return int(directives.get("max-age", 0))
+    except ValueError:
+        return 0
+
+class ResponseCache:
+    def __init__(self, folder, memory_bytes=DEFAULT_MEMORY_BYTES, disk_bytes=DEFAULT_DISK_BYTES, offline=False):
+        self.folder = folder
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.offline = offline
+        self.memory = OrderedDict()
+        self.disk = OrderedDict()
+        self.state = {"memory_bytes": 0, "disk_bytes": 0}
+        self.lock = threading.Lock()
+        self._load_disk_index()
+
+    def _load_disk_index(self):
+        if not os.path.isdir(self.folder):
+            return
+        with os.scandir(self.folder) as entries:
+            cached_files = [entry for entry in entries if entry.is_file() and not entry.name.endswith(".tmp")]
+        cached_files.sort(key=lambda entry: entry.stat().st_mtime)
+        with self.lock:
+            for entry in cached_files:
+                self._remember_on_disk(entry.name, entry.stat().st_size)
+
+    def _remember_on_disk(self, key, size):
+        previous = self.disk.pop(key, None)
+        if previous is not None:
+            self.state["disk_bytes"] -= previous
+        self.disk[key] = size
+        self.state["disk_bytes"] += size
+        evicted = []
+        while self.state["disk_bytes"] > self.disk_bytes and len(self.disk) > 1:
+            evicted_key, evicted_size = self.disk.popitem(last=False)
+            self.state["disk_bytes"] -= evicted_size
+            evicted.append(evicted_key)
+        return evicted
+
+    def _remember_in_memory(self, key, entry):
+        previous = self.memory.pop(key, None)
+        if previous is not None:
+            self.state["memory_bytes"] -= len(previous["body"])
+        self.memory[key] = entry
+        self.state["memory_bytes"] += len(entry["body"])
+        while self.state["memory_bytes"] > self.memory_bytes and len(self.memory) > 1:
+            evicted_key, evicted = self.memory.popitem(last=False)
+            self.state["memory_bytes"] -= len(evicted["body"])
+
+    def key(self, url, accept=""):
+        return hashlib.sha256(f"{accept}\n{url}".encode()).hexdigest()
+
+    def _read_entry(self, key):
+        try:
+            with open(os.path.join(self.folder, key), "rb") as f:
+                metadata, _, body = f.read().partition(b"\n")
+            entry = json.loads(metadata)
+        except (OSError, ValueError):
+            return None
+        entry["body"] = body
+        return entry
+
+    def _write_entry(self, key, entry):
+        metadata = {name: value for name, value in entry.items() if name != "body"}
+        path = os.path.join(self.folder, key)
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(json.dumps(metadata).encode() + b"\n" + entry["body"])
+            os.replace(f"{path}.tmp", path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"Error writing HTTP cache entry: {e}")
+            return
+
+        with self.lock:
+            evicted = self._remember_on_disk(key, size)
+        for evicted_key in evicted:
+            try:
+                os.remove(os.path.join(self.folder, evicted_key))
+            except OSError:
+                pass
+
+    def lookup(self, key):
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+                return entry
+            if key not in self.disk:
+                return None
+            self.disk.move_to_end(key)
+
+        entry = self._read_entry(key)
+        if entry is None:
+            with self.lock:
+                size = self.disk.pop(key, None)
+                if size is not None:
+                    self.state["disk_bytes"] -= size
+            return None
+        try:
+            os.utime(os.path.join(self.folder, key))
+        except OSError:
+            pass
+        with self.lock:
+            self._remember_in_memory(key, entry)
+        return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry["stored"] < entry["max_age"]
+
+    def store(self, key, url, headers, body):
+        directives = _cache_control(headers)
+        if "no-store" in directives:
+            return
+        entry = {
+            "url": url,
+            "headers": {name: headers[name] for name in STORED_HEADERS if name in headers},
+            "stored": time.time(),
+            "max_age": _max_age(directives),
+            "body": body
+        }
+        with self.lock:
+            self._remember_in_memory(key, entry)
+        self._write_entry(key, entry)
+
+    def freshen(self, key, entry, headers):
+        entry = dict(entry, stored=time.time(), max_age=_max_age(_cache_control(headers)))
+        entry["headers"] = dict(entry["headers"], **{name: headers[name] for name in STORED_HEADERS if name in headers})
+        with self.lock:
+            self._remember_in_memory(key, entry)
+        self._write_entry(key, entry)
+        return entry
+
+    def watch(self, key, url, response, stream):
+        if response.status_code != 200 or "no-store" in _cache_control(response.headers):
+            return response
+        if not stream:
+            self.store(key, url, response.headers, response.content)
+            return response
+
+        iter_content = response.iter_content
+
+        def caching_iter_content(chunk_size=1, decode_unicode=False):
+            if decode_unicode:
+                yield from iter_content(chunk_size, decode_unicode)
+                return
+            chunks = []
+            for chunk in iter_content(chunk_size, decode_unicode):
+                chunks.append(chunk)
+                yield chunk
+            self.store(key, url, response.headers, b"".join(chunks))
+
+        response.iter_content = caching_iter_content
+        return response
+
+    def response(self, entry):
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = entry["url"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = entry["body"]
+        response._content_consumed = True
+        return response
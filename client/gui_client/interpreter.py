@@ -197,7 +197,7 @@ def handle_script_tag(root_frame, script_content, root, url_entry, SCRIPT_HANDLE
             else:
                 SCRIPT_HANDLERS[command](args, root, root_frame, url_entry)
 
-def handle_gallery_tag(root_frame, tokens, idx, root, url_entry, _gallery_state, DEFAULT_SERVER, requests, CLIENT_KEY, ttk, tk, _create_label, show_batch_callback):
+def handle_gallery_tag(root_frame, tokens, idx, root, url_entry, _gallery_state, DEFAULT_SERVER, requests, transport, ttk, tk, _create_label, show_batch_callback):
     loading_label = None
     
     try:
@@ -217,7 +217,7 @@ def handle_gallery_tag(root_frame, tokens, idx, root, url_entry, _gallery_state,
                 url_to_fetch = f"http://{DEFAULT_SERVER}/r34/{tag}"
                 
                 try:
-                    response = requests.get(url_to_fetch, headers={"X-API-Key": CLIENT_KEY})
+                    response = transport.get(url_to_fetch)
                     response.raise_for_status()
                     images_data = response.json()
                     
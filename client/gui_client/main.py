@@ -6,11 +6,15 @@ import tkinter.font as tkFont
 from tkinter.font import nametofont
 import requests
 from PIL import Image, ImageTk
-import PIL
 import io
 import threading
-from queue import Queue
+from queue import Queue, Empty
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, quote
 import interpreter
+import transport
+import http_cache
 
 DEFAULT_SERVER = ""
 HOMEPAGE_URL = "homepage://"
@@ -19,17 +23,43 @@ history = []
 history_index = -1
 WINDOW_SIZE = ""
 CLIENT_KEY = ""
+HTTP_SETTINGS = {}
+BFCACHE_PAGES = 5
+BFCACHE_BYTES = 64 * 1024 * 1024
+IMAGE_WORKERS = 4
+GALLERY_WORKERS = 4
 style = None
 fonts = {}
 styles = {}
 _current_bg_color = None
 widgets = {}
-_gallery_state = {"images": [], "index": 0, "parent_frame": None, "load_button": None}
-_image_queue = Queue()
-_image_loader_thread = None
+_gallery_state = {"images": [], "index": 0, "parent_frame": None, "load_button": None, "token": threading.Event(), "futures": {}}
+_navigation_id = 0
+NDJSON_TYPE = "application/x-ndjson"
+SEARCH_HEADERS_ACCEPT = f"{NDJSON_TYPE}, application/json;q=0.9"
+STREAM_BATCH_SIZE = 20
+PREFETCH_RESULTS = 5
+SUGGEST_DELAY_MS = 150
+_prefetched_pages = {}
+_transport = None
+_page_view = {"canvas": None, "window": None}
+_current_page = {"frame": None, "history_index": -1, "complete": False}
+_bfcache = OrderedDict()
+_bfcache_state = {"bytes": 0}
+WIDGET_COST_BYTES = 2048
+_image_pool = None
+_image_jobs = set()
+_image_results = Queue()
+IMAGE_PUMP_MS = 30
+PLACEHOLDER_SIZE = (160, 120)
+PLACEHOLDER_ASPECT = 0.75
+PLACEHOLDER_COLOR = "#D9D9D9"
+_gallery_pool = None
+GALLERY_BATCH_SIZE = 10
+GALLERY_IMAGE_WIDTH = 400
 
 def _load_config():
-    global DEFAULT_SERVER, HOMEPAGE_URL, HOMEPAGE, history, history_index, WINDOW_SIZE, CLIENT_KEY
+    global DEFAULT_SERVER, HOMEPAGE_URL, HOMEPAGE, history, history_index, WINDOW_SIZE, CLIENT_KEY, HTTP_SETTINGS, BFCACHE_PAGES, BFCACHE_BYTES, IMAGE_WORKERS, GALLERY_WORKERS
     config_path = os.path.join(os.path.dirname(__file__), "config.json")
     
     if os.path.exists(config_path):
@@ -45,22 +75,49 @@ def _load_config():
         HOMEPAGE_URL = config.get("homepage_url", "homepage://")
         WINDOW_SIZE = config.get("window_size", "640x480")
         CLIENT_KEY = config.get("key", "")
+        HTTP_SETTINGS = config.get("http", {})
+        BFCACHE_PAGES = config.get("bfcache_pages", 5)
+        BFCACHE_BYTES = config.get("bfcache_bytes", 64 * 1024 * 1024)
+        IMAGE_WORKERS = config.get("image_workers", 4)
+        GALLERY_WORKERS = config.get("gallery_workers", 4)
     else:
         DEFAULT_SERVER = "127.0.0.1:5000"
         HOMEPAGE_URL = "homepage://"
         HOMEPAGE = {}
         WINDOW_SIZE = "640x480"
         CLIENT_KEY = ""
+        HTTP_SETTINGS = {}
         _save_config()
 
+def _create_transport():
+    cache = http_cache.ResponseCache(
+        HTTP_SETTINGS.get("cache_folder", os.path.join(os.path.dirname(__file__), "http_cache")),
+        memory_bytes=HTTP_SETTINGS.get("cache_memory_bytes", http_cache.DEFAULT_MEMORY_BYTES),
+        disk_bytes=HTTP_SETTINGS.get("cache_disk_bytes", http_cache.DEFAULT_DISK_BYTES),
+        offline=HTTP_SETTINGS.get("offline", False)
+    )
+    return transport.Transport(
+        CLIENT_KEY,
+        connect_timeout=HTTP_SETTINGS.get("connect_timeout", transport.DEFAULT_CONNECT_TIMEOUT),
+        read_timeout=HTTP_SETTINGS.get("read_timeout", transport.DEFAULT_READ_TIMEOUT),
+        retries=HTTP_SETTINGS.get("retries", transport.DEFAULT_RETRIES),
+        max_connections_per_host=HTTP_SETTINGS.get("max_connections_per_host", transport.DEFAULT_MAX_CONNECTIONS_PER_HOST),
+        cache=cache
+    )
+
 def _save_config():
-    global DEFAULT_SERVER, HOMEPAGE_URL, HOMEPAGE, history, history_index, WINDOW_SIZE, CLIENT_KEY
+    global DEFAULT_SERVER, HOMEPAGE_URL, HOMEPAGE, history, history_index, WINDOW_SIZE, CLIENT_KEY, HTTP_SETTINGS, BFCACHE_PAGES, BFCACHE_BYTES, IMAGE_WORKERS, GALLERY_WORKERS
     config = {
         "default_server": DEFAULT_SERVER,
         "homepage_url": HOMEPAGE_URL,
         "homepage_code": HOMEPAGE,
         "window_size": WINDOW_SIZE,
-        "key": CLIENT_KEY
+        "key": CLIENT_KEY,
+        "http": HTTP_SETTINGS,
+        "bfcache_pages": BFCACHE_PAGES,
+        "bfcache_bytes": BFCACHE_BYTES,
+        "image_workers": IMAGE_WORKERS,
+        "gallery_workers": GALLERY_WORKERS
     }
     config_path = os.path.join(os.path.dirname(__file__), "config.json")
     with open(config_path, "w") as f:
@@ -114,121 +171,156 @@ def _create_entry(root, font=None, foreground=None, background=None):
     entry.pack(anchor="w")
     return entry
 
-def _create_image(root, src, width=None, height=None, id=None):
-    try:
-        if not src:
-            raise ValueError("No image source provided")
-        
-        headers = {"X-API-Key": CLIENT_KEY}
-        
-        image = None
-        if src.startswith("http"):
-            response= requests.get(src, headers=headers)
-            response.raise_for_status()
-            image_data = io.BytesIO(response.content)
-            image = Image.open(image_data)
-        else:
-            image = Image.open(src)
-        
-        original_width, original_height = image.size
-        new_width, new_height = original_width, original_height
-
-        if width == "auto" and isinstance(height, int):
-            new_width = int(height * (original_width / original_height))
-            new_height = height
-        elif height == "auto" and isinstance(width, int):
-            new_height = int(width / (original_width / original_height))
-            new_width = width
-        elif isinstance(width, int) and isinstance(height, int):
-            new_width = width
-            new_height = height
+def _sized_image_url(src, width=None, height=None):
+    if not src.startswith(f"http://{DEFAULT_SERVER}/images/"):
+        return src
 
-        image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        photo_image = ImageTk.PhotoImage(image)
-        label = ttk.Label(root, image=photo_image, **{'borderwidth': 0, 'relief': 'flat'})
-        label.image = photo_image
-        label.pack(anchor="w")
-        if id:
-            widgets[id] = label
-
-    except Exception as e:
-        _create_label(root, f"Error loading image from {src}: {e}")
-
-def _create_image_button_on_main_thread(parent_frame, img, image_url, tags, root, url_entry):
-    photo_image = ImageTk.PhotoImage(img)
-    button = ttk.Button(parent_frame, image=photo_image, command=lambda: _perform_search(root, parent_frame, url_entry, image_url))
-    button.image = photo_image
-    button.pack(padx=5, pady=5)
-
-def _process_image_queue(root, url_entry):
-    global _gallery_state, _image_queue, _image_loader_thread
-    parent_frame = _gallery_state["parent_frame"]
-    headers = {"X-API-Key": CLIENT_KEY}
-    
-    while not _image_queue.empty():
-        image_url = _image_queue.get()
+    if isinstance(width, int) and isinstance(height, int):
+        params = {"width": width, "height": height, "fit": "fill"}
+    elif isinstance(width, int) and height == "auto":
+        params = {"width": width}
+    elif isinstance(height, int) and width == "auto":
+        params = {"height": height}
+    else:
+        return src
+    return f"{src}{'&' if '?' in src else '?'}{urlencode(params)}"
+
+def _scaled_size(original_size, width, height):
+    original_width, original_height = original_size
+    if width == "auto" and isinstance(height, int):
+        return int(height * (original_width / original_height)), height
+    if height == "auto" and isinstance(width, int):
+        return width, int(width / (original_width / original_height))
+    if isinstance(width, int) and isinstance(height, int):
+        return width, height
+    return original_width, original_height
+
+def _placeholder_size(width, height):
+    if isinstance(width, int) and isinstance(height, int):
+        return width, height
+    if isinstance(width, int):
+        return width, int(width * PLACEHOLDER_ASPECT)
+    if isinstance(height, int):
+        return int(height / PLACEHOLDER_ASPECT), height
+    return PLACEHOLDER_SIZE
+
+def _load_image(src, width, height, is_cancelled):
+    if is_cancelled():
+        return None
+    if src.startswith("http"):
+        response = _transport.get(_sized_image_url(src, width, height))
+        response.raise_for_status()
+        if not response.headers.get('Content-Type', '').startswith('image/'):
+            raise ValueError(f"URL {src} did not return an image. Content-Type: {response.headers.get('Content-Type')}")
+        image = Image.open(io.BytesIO(response.content))
+    else:
+        image = Image.open(src)
+
+    if is_cancelled():
+        return None
+    new_size = _scaled_size(image.size, width, height)
+    if new_size != image.size:
+        return image.resize(new_size, Image.Resampling.LANCZOS)
+    image.load()
+    return image
+
+def _cancel_image_loads():
+    for future in _image_jobs:
+        future.cancel()
+    _image_jobs.clear()
+
+def _pump_image_results(root):
+    while True:
         try:
-            if image_url.endswith(('.mp4', '.webm', '.gif')):
-                continue
-
-            response = requests.get(image_url, headers=headers)
-            response.raise_for_status()
+            label, src, future = _image_results.get_nowait()
+        except Empty:
+            break
+        _image_jobs.discard(future)
+        if future.cancelled() or not label.winfo_exists():
+            continue
+        error = future.exception()
+        if error is not None:
+            label.configure(image="", text=f"Error loading image from {src}: {error}")
+            label.image = None
+            continue
+        image = future.result()
+        if image is not None:
+            photo_image = ImageTk.PhotoImage(image)
+            label.configure(image=photo_image)
+            label.image = photo_image
+    root.after(IMAGE_PUMP_MS, _pump_image_results, root)
 
-            if not response.headers.get('Content-Type', '').startswith('image/'):
-                parent_frame.after(0, _create_label, parent_frame, f"URL {image_url} did not return an image. Content-Type: {response.headers.get('Content-Type')}")
-                continue
+def _create_image(root, src, width=None, height=None, id=None):
+    if not src:
+        _create_label(root, f"Error loading image from {src}: No image source provided")
+        return
 
-            image_data = io.BytesIO(response.content)
-            image = Image.open(image_data)
+    placeholder_width, placeholder_height = _placeholder_size(width, height)
+    placeholder = tk.PhotoImage(width=placeholder_width, height=placeholder_height)
+    placeholder.put(PLACEHOLDER_COLOR, to=(0, 0, placeholder_width, placeholder_height))
+    label = ttk.Label(root, image=placeholder, **{'borderwidth': 0, 'relief': 'flat'})
+    label.image = placeholder
+    label.pack(anchor="w")
+    if id:
+        widgets[id] = label
 
-            width = 400
-            height = "auto"
-            
-            original_width, original_height = image.size
-            new_width, new_height = original_width, original_height
-
-            if width == "auto" and isinstance(height, int):
-                new_width = int(height * (original_width / original_height))
-                new_height = height
-            elif height == "auto" and isinstance(width, int):
-                new_height = int(width / (original_width / original_height))
-                new_width = width
-            elif isinstance(width, int) and isinstance(height, int):
-                new_width = width
-                new_height = height
-
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            parent_frame.after(0, _create_image_button_on_main_thread, parent_frame, image, image_url, None, root, url_entry)
-            
-        except requests.exceptions.RequestException as e:
-            parent_frame.after(0, _create_label, parent_frame, f"Network Error for image {image_url}: {e}")
-        except PIL.UnidentifiedImageError:
-            parent_frame.after(0, _create_label, parent_frame, f"Could not open image file from URL: {e}")
-        
-    _image_queue.task_done()
+    navigation_id = _navigation_id
+    future = _image_pool.submit(_load_image, src, width, height, lambda: navigation_id != _navigation_id)
+    _image_jobs.add(future)
+    future.add_done_callback(lambda future: _image_results.put((label, src, future)))
+
+def _cancel_gallery():
+    _gallery_state["token"].set()
+    for future in _gallery_state["futures"].values():
+        future.cancel()
+    _gallery_state["token"] = threading.Event()
+    _gallery_state["futures"] = {}
+
+def _gallery_future(image_url):
+    future = _gallery_state["futures"].get(image_url)
+    if future is None:
+        token = _gallery_state["token"]
+        future = _gallery_pool.submit(_load_image, image_url, GALLERY_IMAGE_WIDTH, "auto", token.is_set)
+        _gallery_state["futures"][image_url] = future
+    return future
+
+def _gallery_urls(start_index, batch_size):
+    urls = []
+    for image_info in _gallery_state["images"][start_index:start_index + batch_size]:
+        image_url = image_info.get("url")
+        if image_url and not image_url.endswith(('.mp4', '.webm', '.gif')):
+            urls.append(image_url)
+    return urls
 
-def _show_batch(root, url_entry, batch_size=10):
-    global _gallery_state, _image_queue, _image_loader_thread
-    
+def _show_batch(root, url_entry, batch_size=GALLERY_BATCH_SIZE):
     parent_frame = _gallery_state["parent_frame"]
     for widget in parent_frame.winfo_children():
         widget.destroy()
 
-    _image_queue = Queue()
-    
-    start_index = _gallery_state["index"]
-    end_index = min(start_index + batch_size, len(_gallery_state["images"]))
-
-    for i in range(start_index, end_index):
-        image_info = _gallery_state["images"][i]
-        image_url = image_info.get("url")
-        if image_url:
-            _image_queue.put(image_url)
+    if _gallery_state["token"].is_set():
+        _gallery_state["token"] = threading.Event()
+        _gallery_state["futures"] = {}
 
-    _image_loader_thread = threading.Thread(target=_process_image_queue, args=(root, url_entry), daemon=True)
-    _image_loader_thread.start()
+    start_index = _gallery_state["index"]
+    batch_urls = _gallery_urls(start_index, batch_size)
+    next_urls = _gallery_urls(start_index + batch_size, batch_size)
+    for image_url in set(_gallery_state["futures"]) - set(batch_urls) - set(next_urls):
+        _gallery_state["futures"].pop(image_url).cancel()
+
+    placeholder_width, placeholder_height = _placeholder_size(GALLERY_IMAGE_WIDTH, "auto")
+    for image_url in batch_urls:
+        placeholder = tk.PhotoImage(width=placeholder_width, height=placeholder_height)
+        placeholder.put(PLACEHOLDER_COLOR, to=(0, 0, placeholder_width, placeholder_height))
+        button = ttk.Button(parent_frame, image=placeholder, command=lambda image_url=image_url: _perform_search(root, parent_frame, url_entry, image_url))
+        button.image = placeholder
+        button.pack(padx=5, pady=5)
+
+        future = _gallery_future(image_url)
+        _image_jobs.add(future)
+        future.add_done_callback(lambda future, button=button, image_url=image_url: _image_results.put((button, image_url, future)))
+
+    for image_url in next_urls:
+        _gallery_future(image_url)
 
     _setup_navigation_buttons(root, url_entry, batch_size)
 
@@ -349,22 +441,27 @@ def _handle_search(text, root, content_frame, url_entry):
 def _handle_wiki_search(text, root, content_frame, url_entry):
     _perform_search(root, content_frame, url_entry, f"http://{DEFAULT_SERVER}/wiki_search/{text}")
 
-def _fetch_and_render_page(root, content_frame, url_entry, url_to_request, search_terms, loading_label):
-    global CLIENT_KEY
+def _fetch_and_render_page(root, content_frame, url_entry, url_to_request, search_terms, loading_label, cache_mode=None):
     results = None
     
     try:
-        headers = {"X-API-Key": CLIENT_KEY}
-        
         if url_to_request.startswith("file://"):
             with open(url_to_request.replace("file://", ""), 'r') as f:
                 results = json.load(f)
 
+        elif _page_request_url(url_to_request) in _prefetched_pages:
+            url_to_request = _page_request_url(url_to_request)
+            results = _prefetched_pages.pop(url_to_request)
+
         elif url_to_request.startswith("http://") or url_to_request.startswith("https://"):
-            response = requests.get(url_to_request, headers=headers)
+            response = _transport.get(url_to_request, cache_mode=cache_mode, headers={"Accept": SEARCH_HEADERS_ACCEPT}, stream=True)
             response.raise_for_status()
             
             content_type = response.headers.get('Content-Type', '')
+            if content_type.startswith(NDJSON_TYPE):
+                _stream_search_results(response, url_to_request, root, content_frame, url_entry, search_terms, loading_label)
+                return
+
             if content_type.startswith('image/'):
                 image_data = io.BytesIO(response.content)
                 image = Image.open(image_data)
@@ -383,18 +480,20 @@ def _fetch_and_render_page(root, content_frame, url_entry, url_to_request, searc
             results = response.json()
         
         else:
-            if ' ' in url_to_request or not ('.' in url_to_request or ':' in url_to_request):
-                url_to_request = f"http://{DEFAULT_SERVER}/search/{url_to_request}"
-            else:
-                url_to_request = f"http://{url_to_request}"
-            
-            response = requests.get(url_to_request, headers=headers)
+            url_to_request = _page_request_url(url_to_request)
+            response = _transport.get(url_to_request, cache_mode=cache_mode, headers={"Accept": SEARCH_HEADERS_ACCEPT}, stream=True)
             response.raise_for_status()
+            if response.headers.get('Content-Type', '').startswith(NDJSON_TYPE):
+                _stream_search_results(response, url_to_request, root, content_frame, url_entry, search_terms, loading_label)
+                return
             results = response.json()
 
+        if isinstance(results, list):
+            _start_prefetch(results)
         root.after(0, lambda: [loading_label.destroy(), _handle_search_results(results, url_to_request, root, content_frame, url_entry, search_terms)])
     
     except requests.exceptions.HTTPError as e:
+        e.response.close()
         if e.response.status_code == 404:
             root.after(0, lambda: [loading_label.destroy(), _create_label(content_frame, f"Error 404: '{url_to_request}' not found.")])
         elif e.response.status_code == 401:
@@ -404,8 +503,164 @@ def _fetch_and_render_page(root, content_frame, url_entry, url_to_request, searc
     except requests.exceptions.RequestException as e:
         root.after(0, lambda: [loading_label.destroy(), _create_label(content_frame, f"Network Error: {e}")])
 
+def _page_request_url(url):
+    if url.startswith("http://") or url.startswith("https://"):
+        return url
+    if ' ' in url or not ('.' in url or ':' in url):
+        return f"http://{DEFAULT_SERVER}/search/{url}"
+    return f"http://{url}"
+
+def _prefetch_result_pages(request_urls):
+    for request_url in request_urls:
+        try:
+            response = _transport.get(request_url, headers={"Accept": SEARCH_HEADERS_ACCEPT})
+            response.raise_for_status()
+            if response.headers.get('Content-Type', '').startswith('application/json'):
+                page = response.json()
+                if isinstance(page, dict):
+                    _prefetched_pages[request_url] = page
+        except (requests.exceptions.RequestException, ValueError):
+            continue
+
+def _start_prefetch(results):
+    _prefetched_pages.clear()
+    request_urls = [
+        _page_request_url(result["url"]) for result in results[:PREFETCH_RESULTS]
+        if isinstance(result, dict) and isinstance(result.get("url"), str) and not result["url"].startswith("file://")
+    ]
+    request_urls = [url for url in request_urls if not url.startswith(f"http://{DEFAULT_SERVER}/search/")]
+    if request_urls:
+        threading.Thread(target=_prefetch_result_pages, args=(request_urls,), daemon=True).start()
+
+def _read_ndjson(response):
+    for line in response.iter_lines():
+        if line:
+            yield json.loads(line)
+
+def _stream_search_results(response, url_to_request, root, content_frame, url_entry, search_terms, loading_label):
+    navigation_id = _navigation_id
+    total = int(response.headers.get("X-Total-Count", 0))
+    root.after(0, lambda: [loading_label.destroy(), _handle_search_results([], url_to_request, root, content_frame, url_entry, search_terms, total=total, complete=False)])
+
+    with response:
+        batch = []
+        prefetch = []
+        for result in _read_ndjson(response):
+            if navigation_id != _navigation_id:
+                return
+            batch.append(result)
+            if len(prefetch) < PREFETCH_RESULTS:
+                prefetch.append(result)
+                if len(prefetch) == PREFETCH_RESULTS:
+                    _start_prefetch(prefetch)
+            if len(batch) >= STREAM_BATCH_SIZE:
+                root.after(0, lambda results=batch: _append_search_results(results, url_to_request, root, content_frame, url_entry, navigation_id))
+                batch = []
+        if batch:
+            root.after(0, lambda: _append_search_results(batch, url_to_request, root, content_frame, url_entry, navigation_id))
+        if len(prefetch) < PREFETCH_RESULTS:
+            _start_prefetch(prefetch)
+        root.after(0, lambda: _mark_page_complete(content_frame))
+
+def _frame_cost(frame):
+    cost = 0
+    pending = [frame]
+    while pending:
+        widget = pending.pop()
+        cost += WIDGET_COST_BYTES
+        image = getattr(widget, "image", None)
+        if image is not None:
+            cost += image.width() * image.height() * 4
+        pending.extend(widget.winfo_children())
+    return cost
+
+def _update_scrollregion():
+    canvas = _page_view["canvas"]
+    canvas.configure(scrollregion=canvas.bbox("all"))
+
+def _show_page_frame(frame, yview=0.0):
+    canvas = _page_view["canvas"]
+    canvas.itemconfigure(_page_view["window"], window=frame)
+    canvas.after_idle(lambda: [_update_scrollregion(), canvas.yview_moveto(yview)])
+
+def _new_page_frame():
+    frame = ttk.Frame(_page_view["canvas"], style="Page.TFrame")
+    frame.bind("<Configure>", lambda event: _update_scrollregion())
+    _show_page_frame(frame)
+    _current_page.update(frame=frame, history_index=history_index, complete=False)
+    return frame
+
+def _mark_page_complete(frame):
+    if _current_page["frame"] is frame:
+        _current_page["complete"] = True
+
+def _evict_cached_page(index):
+    evicted = _bfcache.pop(index)
+    _bfcache_state["bytes"] -= evicted["bytes"]
+    evicted["frame"].destroy()
+
+def _leave_page(root, url_entry):
+    frame = _current_page["frame"]
+    _current_page["frame"] = None
+    if frame is None:
+        return
+    if not _current_page["complete"] or _image_jobs or BFCACHE_PAGES <= 0:
+        frame.destroy()
+        return
+
+    index = _current_page["history_index"]
+    if index in _bfcache:
+        _evict_cached_page(index)
+    cost = _frame_cost(frame)
+    _bfcache[index] = {
+        "frame": frame,
+        "entry": history[index] if 0 <= index < len(history) else None,
+        "widgets": dict(widgets),
+        "gallery": dict(_gallery_state),
+        "background": _current_bg_color,
+        "title": root.title(),
+        "url": url_entry.get(),
+        "yview": _page_view["canvas"].yview()[0],
+        "bytes": cost
+    }
+    _bfcache_state["bytes"] += cost
+    while _bfcache and (len(_bfcache) > BFCACHE_PAGES or _bfcache_state["bytes"] > BFCACHE_BYTES):
+        _evict_cached_page(next(iter(_bfcache)))
+
+def _drop_forward_pages(first_index):
+    for index in [index for index in _bfcache if index >= first_index]:
+        _evict_cached_page(index)
+
+def _restore_page(root, url_entry, index):
+    global _current_bg_color
+    cached = _bfcache.get(index)
+    if cached is None:
+        return False
+    if cached["entry"] != history[index]:
+        _evict_cached_page(index)
+        return False
+    del _bfcache[index]
+    _bfcache_state["bytes"] -= cached["bytes"]
+
+    _current_bg_color = cached["background"]
+    style.configure("Page.TFrame", background=_current_bg_color)
+    _page_view["canvas"].configure(bg=_current_bg_color)
+    widgets.clear()
+    widgets.update(cached["widgets"])
+    _gallery_state.update(cached["gallery"])
+    root.title(cached["title"])
+    url_entry.delete(0, tk.END)
+    url_entry.insert(0, cached["url"])
+
+    _show_page_frame(cached["frame"], cached["yview"])
+    _current_page.update(frame=cached["frame"], history_index=index, complete=True)
+    return True
+
 def _perform_search(root, content_frame, url_entry, search_terms, push_to_history=True):
-    global history, history_index, CLIENT_KEY, _current_bg_color, _image_loader_thread
+    global history, history_index, CLIENT_KEY, _current_bg_color, _navigation_id
+
+    _navigation_id += 1
+    cache_mode = None if push_to_history else "prefer"
 
     if isinstance(search_terms, list):
         search_terms = ' '.join(search_terms)
@@ -415,17 +670,21 @@ def _perform_search(root, content_frame, url_entry, search_terms, push_to_histor
             history = history[:history_index + 1]
         history.append(search_terms)
         history_index = len(history) - 1
+        _drop_forward_pages(history_index)
 
-    if _image_loader_thread and _image_loader_thread.is_alive():
-        _image_queue.queue.clear()
+    _leave_page(root, url_entry)
+    _cancel_image_loads()
+    _cancel_gallery()
+    if not push_to_history and _restore_page(root, url_entry, history_index):
+        return
+    content_frame = _new_page_frame()
 
     if search_terms.lower() == "homepage://":
-        for widget in content_frame.winfo_children():
-            widget.destroy()
         root.title("Homepage")
         url_entry.delete(0, tk.END)
         url_entry.insert(0, "homepage://")
         render_page(content_frame, HOMEPAGE, root, url_entry)
+        _mark_page_complete(content_frame)
         return
 
     if search_terms.startswith(f"http://{DEFAULT_SERVER}/wiki_search/"):
@@ -436,7 +695,9 @@ def _perform_search(root, content_frame, url_entry, search_terms, push_to_histor
         
         def fetch_wiki_data():
             try:
-                response = requests.get(url_to_request, headers={"X-API-Key": CLIENT_KEY})
+                response = _transport.get(url_to_request, cache_mode=cache_mode, headers={"Accept": SEARCH_HEADERS_ACCEPT}, stream=True)
+                if response.status_code >= 400:
+                    response.close()
                 if response.status_code == 400:
                     root.after(0, lambda: [loading_label.destroy(), _create_label(content_frame, "Error: No search term provided. Please enter a word or phrase.")])
                     return
@@ -444,6 +705,9 @@ def _perform_search(root, content_frame, url_entry, search_terms, push_to_histor
                     root.after(0, lambda: [loading_label.destroy(), _create_label(content_frame, f"Error: No wiki entries found for '{wiki_term}'.")])
                     return
                 response.raise_for_status()
+                if response.headers.get('Content-Type', '').startswith(NDJSON_TYPE):
+                    _stream_search_results(response, url_to_request, root, content_frame, url_entry, wiki_term, loading_label)
+                    return
                 wiki_data = response.json()
                 
                 root.after(0, lambda: [
@@ -465,11 +729,96 @@ def _perform_search(root, content_frame, url_entry, search_terms, push_to_histor
     url_entry.delete(0, tk.END)
     url_entry.insert(0, url_to_request.replace(" ", "%20"))
 
-    threading.Thread(target=_fetch_and_render_page, args=(root, content_frame, url_entry, url_to_request, search_terms, loading_label)).start()
+    threading.Thread(target=_fetch_and_render_page, args=(root, content_frame, url_entry, url_to_request, search_terms, loading_label, cache_mode)).start()
+
+def _fetch_suggestions(prefix):
+    response = _transport.get(f"http://{DEFAULT_SERVER}/suggest/{quote(prefix)}", timeout=2)
+    response.raise_for_status()
+    return response.json()
+
+def _attach_suggestions(root, content_frame, entry_field):
+    listbox = tk.Listbox(content_frame, height=0, exportselection=False)
+    state = {"job": None, "request": 0}
+
+    def show(request_id, suggestions):
+        if request_id != state["request"] or not listbox.winfo_exists():
+            return
+        listbox.delete(0, tk.END)
+        for suggestion in suggestions:
+            listbox.insert(tk.END, suggestion)
+        if suggestions:
+            listbox.configure(height=len(suggestions))
+            listbox.pack(after=entry_field, anchor="w")
+        else:
+            listbox.pack_forget()
 
-def _handle_search_results(results, url_to_request, root, content_frame, url_entry, search_terms):
+    def fetch(request_id, prefix):
+        try:
+            suggestions = _fetch_suggestions(prefix)
+        except (requests.exceptions.RequestException, ValueError):
+            suggestions = []
+        root.after(0, lambda: show(request_id, suggestions))
+
+    def on_key(event):
+        if state["job"] is not None:
+            root.after_cancel(state["job"])
+            state["job"] = None
+        state["request"] += 1
+        prefix = entry_field.get().split(" ")[-1]
+        if event.keysym in ("Return", "Escape") or not prefix:
+            listbox.pack_forget()
+            return
+        request_id = state["request"]
+        state["job"] = root.after(SUGGEST_DELAY_MS, lambda: threading.Thread(target=fetch, args=(request_id, prefix), daemon=True).start())
+
+    def on_select(event):
+        selection = listbox.curselection()
+        if not selection:
+            return
+        words = entry_field.get().split(" ")
+        words[-1] = listbox.get(selection[0])
+        entry_field.delete(0, tk.END)
+        entry_field.insert(0, " ".join(words) + " ")
+        listbox.pack_forget()
+        entry_field.focus_set()
+
+    entry_field.bind("<KeyRelease>", on_key)
+    listbox.bind("<<ListboxSelect>>", on_select)
+
+def _search_result_font():
+    font_params = {
+        "family": "TkFixedFont",
+        "size": 10,
+        "weight": "normal",
+        "slant": "roman"
+    }
+
+    font_key = tuple(font_params.values())
+    if font_key not in fonts:
+        fonts[font_key] = tkFont.Font(**font_params)
+    return fonts[font_key]
+
+def _append_search_results(results, url_to_request, root, content_frame, url_entry, navigation_id=None):
+    if navigation_id is not None and navigation_id != _navigation_id:
+        return
+
+    if url_to_request.startswith(f"http://{DEFAULT_SERVER}/wiki_search/"):
+        for result in results:
+            if "url" in result:
+                _create_button(content_frame, result["url"], command=lambda url=result["url"]: _perform_search(root, content_frame, url_entry, url))
+                _create_label(content_frame, result.get("snippet", result.get("content", "")), background=_current_bg_color)
+    else:
+        for result in results:
+            if "url" in result:
+                _create_button(content_frame, result["url"], command=lambda url=result["url"]: _perform_search(root, content_frame, url_entry, url), font=_search_result_font())
+                _create_label(content_frame, result.get("snippet", result.get("content", "")), background=_current_bg_color)
+
+def _handle_search_results(results, url_to_request, root, content_frame, url_entry, search_terms, total=None, complete=True):
     global _current_bg_color, style, fonts
 
+    if not content_frame.winfo_exists():
+        return
+
     for widget in content_frame.winfo_children():
         widget.destroy()
 
@@ -487,42 +836,29 @@ def _handle_search_results(results, url_to_request, root, content_frame, url_ent
         content_frame.master.configure(bg=_current_bg_color)
         if url_to_request.startswith(f"http://{DEFAULT_SERVER}/wiki_search/"):
             root.title(f"Wiki Search for {search_terms}")
-            _create_label(content_frame, f"{len(results)} Wiki Results:", font=tkFont.Font(family="TkFixedFont", size=18, weight="bold"), background=_current_bg_color)
+            _create_label(content_frame, f"{len(results) if total is None else total} Wiki Results:", font=tkFont.Font(family="TkFixedFont", size=18, weight="bold"), background=_current_bg_color)
             _create_label(content_frame, "", font=tkFont.Font(family="TkFixedFont", size=12), background=_current_bg_color)
-            
-            for result in results:
-                if "content" in result and "url" in result:
-                    _create_button(content_frame, result["url"], command=lambda url=result["url"]: _perform_search(root, content_frame, url_entry, url))
-                    _create_label(content_frame, result["content"], background=_current_bg_color)
         else:
             root.title(f"Results for {search_terms}")
             _create_label(content_frame, f"AllKnow-er", font=tkFont.Font(family="TkFixedFont", size=22, weight="bold"), background=_current_bg_color)
             _create_label(content_frame, "", font=tkFont.Font(family="TkFixedFont", size=12), background=_current_bg_color)
 
-            font_params = {
-                "family": "TkFixedFont",
-                "size": 10,
-                "weight": "normal",
-                "slant": "roman"
-            }
-
-            font_key = tuple(font_params.values())
-            if font_key not in fonts:
-                fonts[font_key] = tkFont.Font(**font_params)
-
-            entry_field = _create_entry(content_frame, font=fonts[font_key], foreground="#000000", background="#FFFFFF")
-            _create_button(content_frame, text="Search", command=lambda: _perform_search(root, content_frame, url_entry, entry_field.get()), font=fonts[font_key])
+            font = _search_result_font()
+            entry_field = _create_entry(content_frame, font=font, foreground="#000000", background="#FFFFFF")
+            _create_button(content_frame, text="Search", command=lambda: _perform_search(root, content_frame, url_entry, entry_field.get()), font=font)
             entry_field.insert(0, search_terms.replace(f"http://{DEFAULT_SERVER}/search/", ""))
+            _attach_suggestions(root, content_frame, entry_field)
 
-            _create_label(content_frame, f"{len(results)} Results:", font=tkFont.Font(family="TkFixedFont", size=18, weight="bold"), background=_current_bg_color)
-            
-            for result in results:
-                if "url" in result and "content" in result:
-                    _create_button(content_frame, result["url"], command=lambda url=result["url"]: _perform_search(root, content_frame, url_entry, url), font=fonts[font_key])
-                    _create_label(content_frame, result["content"], background=_current_bg_color)
+            _create_label(content_frame, f"{len(results) if total is None else total} Results:", font=tkFont.Font(family="TkFixedFont", size=18, weight="bold"), background=_current_bg_color)
+
+        _append_search_results(results, url_to_request, root, content_frame, url_entry)
             
     else:
         _create_label(content_frame, f"Error: '{search_terms}' not found.")
+        return
+
+    if complete:
+        _mark_page_complete(content_frame)
 
 COMMAND_HANDLERS = {
     "search": lambda text, root, content_frame, url_entry: _handle_search(text, root, content_frame, url_entry),
@@ -592,7 +928,7 @@ def render_page(root_frame, website_data, root, url_entry):
                     elif tokens[0] == "<button>":
                         handler(root_frame, tokens, 0, fonts, tkFont, _create_button)
                     elif tokens[0] == "<gallery>":
-                        handler(root_frame, tokens, 0, root, url_entry, _gallery_state, DEFAULT_SERVER, requests, CLIENT_KEY, ttk, tk, _create_label, _show_batch)
+                        handler(root_frame, tokens, 0, root, url_entry, _gallery_state, DEFAULT_SERVER, requests, _transport, ttk, tk, _create_label, _show_batch)
                     elif tokens[0] == "<t>":
                         handler(root_frame, tokens, 0, fonts, tkFont, _create_label)
             idx += 1
@@ -604,8 +940,11 @@ def close_browser(root):
     root.destroy()
 
 def main():
-    global style, _current_bg_color
+    global style, _current_bg_color, _transport, _image_pool, _gallery_pool
     _load_config()
+    _transport = _create_transport()
+    _image_pool = ThreadPoolExecutor(max_workers=IMAGE_WORKERS)
+    _gallery_pool = ThreadPoolExecutor(max_workers=GALLERY_WORKERS)
     root = tk.Tk()
     root.title("Homepage")
     root.geometry(WINDOW_SIZE)
@@ -647,9 +986,20 @@ def main():
 
     search_button = ttk.Button(url_frame, text="Search", width=8, command=lambda: _perform_search(root, inner_content_frame, url_entry, url_entry.get()))
     search_button.pack(side=tk.LEFT, padx=5)
+
+    offline_var = tk.BooleanVar(value=_transport.cache.offline)
+
+    def toggle_offline():
+        _transport.cache.offline = HTTP_SETTINGS["offline"] = offline_var.get()
+
+    offline_button = ttk.Checkbutton(url_frame, text="Offline", variable=offline_var, command=toggle_offline)
+    offline_button.pack(side=tk.LEFT, padx=5)
     
     def on_closing():
         _save_config()
+        _image_pool.shutdown(wait=False, cancel_futures=True)
+        _gallery_pool.shutdown(wait=False, cancel_futures=True)
+        _transport.close()
         root.destroy()
     root.protocol("WM_DELETE_WINDOW", on_closing)
 
@@ -670,12 +1020,11 @@ def main():
     canvas.pack(side="left", fill="both", expand=True)
     
     inner_content_frame = ttk.Frame(canvas)
-    canvas.create_window((0, 0), window=inner_content_frame, anchor="nw")
-
-    def on_frame_configure(event):
-        canvas.configure(scrollregion=canvas.bbox("all"))
+    _page_view["canvas"] = canvas
+    _page_view["window"] = canvas.create_window((0, 0), window=inner_content_frame, anchor="nw")
+    _current_page["frame"] = inner_content_frame
     
-    inner_content_frame.bind("<Configure>", on_frame_configure)
+    inner_content_frame.bind("<Configure>", lambda event: _update_scrollregion())
 
     _current_bg_color = "#C0C0C0"
     style.configure("Page.TFrame", background=_current_bg_color)
@@ -686,6 +1035,7 @@ def main():
     
     url_entry.insert(0, start_url.replace(" ", "%20"))
     _perform_search(root, inner_content_frame, url_entry, start_url, push_to_history=True)
+    _pump_image_results(root)
     
     root.mainloop()
 
@@ -0,0 +1,78 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_RETRIES = 2
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 8
+RETRY_STATUSES = (429, 502, 503, 504)
+
+class Transport:
+    def __init__(self, key="", connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 retries=DEFAULT_RETRIES, max_connections_per_host=DEFAULT_MAX_CONNECTIONS_PER_HOST, cache=None):
+        self.key = key
+        self.cache = cache
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.2,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=("GET", "HEAD"),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=max_connections_per_host,
+            pool_block=True,
+            max_retries=retry
+        )
+        self._local = threading.local()
+
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.mount("http://", self.adapter)
+            session.mount("https://", self.adapter)
+        session.headers["X-API-Key"] = self.key
+        return session
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session().request(method, url, **kwargs)
+
+    def get(self, url, cache_mode=None, **kwargs):
+        if self.cache is None:
+            return self.request("GET", url, **kwargs)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        key = self.cache.key(url, headers.get("Accept", ""))
+        entry = self.cache.lookup(key)
+        offline = self.cache.offline or cache_mode == "only"
+        if entry is not None and (offline or cache_mode == "prefer" or self.cache.is_fresh(entry)):
+            return self.cache.response(entry)
+        if offline:
+            raise requests.exceptions.ConnectionError(f"Offline: {url} is not cached")
+
+        if entry is not None and "ETag" in entry["headers"]:
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        try:
+            response = self.request("GET", url, headers=headers, **kwargs)
+        except requests.exceptions.ConnectionError:
+            if entry is None:
+                raise
+            return self.cache.response(entry)
+
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            return self.cache.response(self.cache.freshen(key, entry, response.headers))
+        return self.cache.watch(key, url, response, kwargs.get("stream", False))
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.adapter.close()
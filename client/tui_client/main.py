@@ -1,78 +1,88 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
 import sys
+from urllib.parse import quote
+
+try:
+    import readline
+except ImportError:
+    readline = None
 
 DEFAULT_SERVER = "192.168.178.67:5000"
 CLIENT_KEY = "lsz4/+!R[fJ]rsTI|9QPl{cfc3\"OV0#Z$ldbgC!\"bQ<49sPVC5T`jys1MovLqX"
+NDJSON_TYPE = "application/x-ndjson"
+TIMEOUT = (3.05, 30)
+RETRIES = 2
+MAX_CONNECTIONS_PER_HOST = 4
+_completions = []
+
+def _create_session():
+    session = requests.Session()
+    session.headers["X-API-Key"] = CLIENT_KEY
+    retry = Retry(
+        total=RETRIES,
+        backoff_factor=0.2,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_maxsize=MAX_CONNECTIONS_PER_HOST, pool_block=True, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+_session = _create_session()
+
+def _read_ndjson(response):
+    for line in response.iter_lines():
+        if line:
+            yield json.loads(line)
+
+def _render_results(url, results, link_offset=0):
+    links = []
+    print(f"\n--- Suchergebnisse für '{url}' ---")
+    for item in results:
+        if isinstance(item, dict) and "url" in item:
+            links.append(item["url"])
+            print(f"[{link_offset + len(links)}] {item['url']}\n    {item.get('snippet', item.get('content', ''))}", flush=True)
+    if not links:
+        print("Keine Ergebnisse gefunden.")
+    return links
 
 def fetch_and_render(url):
     try:
         if "://" not in url:
             url = f"http://{url}"
         
-        headers = {"X-API-Key": CLIENT_KEY}
+        headers = {"Accept": f"{NDJSON_TYPE}, application/json;q=0.9"}
         
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        with _session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+            response.raise_for_status()
+            if response.headers.get("Content-Type", "").startswith(NDJSON_TYPE):
+                return _render_results(url, _read_ndjson(response))
+            page_data = response.json()
         
-        page_data = response.json()
+        return _render_page_data(url, page_data)
         
-        links = []
-        
-        if isinstance(page_data, list):
-            print(f"\n--- Suchergebnisse für '{url}' ---")
-            if not page_data:
-                print("Keine Ergebnisse gefunden.")
-            
-            for item in page_data:
-                if isinstance(item, dict) and "url" in item and "content" in item:
-                    links.append(item["url"])
-                    print(f"[{len(links)}] {item['url']}\n    {item['content']}")
-            return links
-        
-        elif isinstance(page_data, dict):
-            markup_content = page_data.get("markup")
-            if markup_content is None and isinstance(page_data.get("source_code"), dict):
-                markup_content = page_data["source_code"].get("markup")
+    except requests.exceptions.RequestException as e:
+        print(f"Fehler: {e}")
+        return None
+    except json.JSONDecodeError:
+        print("Fehler: Server-Antwort ist kein gültiges JSON.")
+        return None
 
-            if markup_content:
-                print(f"\n--- Seite '{url}' wird geladen ---")
-                
-                for line in markup_content:
-                    line_stripped = line.strip()
-                    if not line_stripped.startswith("<"):
-                        continue
-
-                    if line_stripped.startswith("<t>"):
-                        text_part = line_stripped.split(";", 1)[0].replace("<t>", "").replace(" <nl> ", '\n').strip()
-                        print(text_part)
-
-                    elif line_stripped.startswith("<e>"):
-                        entry_text = line_stripped.split(";", 1)[0].replace("<e>", "").strip()
-                        print(f"[{entry_text}]")
-                        
-                    elif line_stripped.startswith("<a>"):
-                        parts = line_stripped.split("href")
-                        if len(parts) > 1:
-                            link_text = parts[0].replace("<a>", "").strip()
-                            href_url = parts[1].split()[0]
-                            links.append(href_url)
-                            print(f"[{len(links)}] {link_text}")
-
-                    elif line_stripped.startswith("<img>"):
-                        image_url = line_stripped.split()[1]
-                        print(f"[Bild: {image_url}]")
-                    
-                    elif line_stripped.startswith("<mainbg>"):
-                        bg_color = line_stripped.split()[1]
-                        print(f"[Hintergrundfarbe: {bg_color}]")
-                        
-                    elif line_stripped.startswith("<script>"):
-                        print("[Skript wird ausgeführt]")
-
-        return links
-        
+def fetch_batch(paths):
+    response = _session.post(f"http://{DEFAULT_SERVER}/batch", json={"requests": paths}, timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def fetch_and_render_batch(paths):
+    try:
+        entries = fetch_batch(paths)
     except requests.exceptions.RequestException as e:
         print(f"Fehler: {e}")
         return None
@@ -80,8 +90,79 @@ def fetch_and_render(url):
         print("Fehler: Server-Antwort ist kein gültiges JSON.")
         return None
 
+    links = []
+    for entry in entries:
+        if entry["status"] != 200:
+            print(f"\nFehler {entry['status']} für '{entry['path']}'")
+            continue
+        links.extend(_render_page_data(entry["path"], entry["body"], len(links)))
+    return links
+
+def _render_page_data(url, page_data, link_offset=0):
+    links = []
+    if isinstance(page_data, list):
+        return _render_results(url, page_data, link_offset)
+    
+    elif isinstance(page_data, dict):
+        markup_content = page_data.get("markup")
+        if markup_content is None and isinstance(page_data.get("source_code"), dict):
+            markup_content = page_data["source_code"].get("markup")
+
+        if markup_content:
+            print(f"\n--- Seite '{url}' wird geladen ---")
+            
+            for line in markup_content:
+                line_stripped = line.strip()
+                if not line_stripped.startswith("<"):
+                    continue
+
+                if line_stripped.startswith("<t>"):
+                    text_part = line_stripped.split(";", 1)[0].replace("<t>", "").replace(" <nl> ", '\n').strip()
+                    print(text_part)
+
+                elif line_stripped.startswith("<e>"):
+                    entry_text = line_stripped.split(";", 1)[0].replace("<e>", "").strip()
+                    print(f"[{entry_text}]")
+                    
+                elif line_stripped.startswith("<a>"):
+                    parts = line_stripped.split("href")
+                    if len(parts) > 1:
+                        link_text = parts[0].replace("<a>", "").strip()
+                        href_url = parts[1].split()[0]
+                        links.append(href_url)
+                        print(f"[{link_offset + len(links)}] {link_text}")
+
+                elif line_stripped.startswith("<img>"):
+                    image_url = line_stripped.split()[1]
+                    print(f"[Bild: {image_url}]")
+                
+                elif line_stripped.startswith("<mainbg>"):
+                    bg_color = line_stripped.split()[1]
+                    print(f"[Hintergrundfarbe: {bg_color}]")
+                    
+                elif line_stripped.startswith("<script>"):
+                    print("[Skript wird ausgeführt]")
+
+    return links
+
+def fetch_suggestions(prefix):
+    response = _session.get(f"http://{DEFAULT_SERVER}/suggest/{quote(prefix)}", timeout=2)
+    response.raise_for_status()
+    return response.json()
+
+def _complete(text, state):
+    if state == 0:
+        try:
+            _completions[:] = fetch_suggestions(text) if text else []
+        except (requests.exceptions.RequestException, ValueError):
+            _completions[:] = []
+    return _completions[state] if state < len(_completions) else None
+
 def main_loop():
     print("Willkommen im Konsolen-Browser!")
+    if readline is not None:
+        readline.set_completer(_complete)
+        readline.parse_and_bind("tab: complete")
     
     initial_url = input("URL eingeben (z.B. homepage://): ")
     current_links = fetch_and_render(initial_url)
@@ -91,6 +172,7 @@ def main_loop():
         
         if user_input.lower() in ["exit", "quit", "q"]:
             print("Client wird geschlossen.")
+            _session.close()
             sys.exit()
 
         if user_input.isdigit():
@@ -103,6 +185,19 @@ def main_loop():
                 print("Ungültige Link-Nummer.")
             continue
 
+        if user_input.startswith("suggest "):
+            try:
+                suggestions = fetch_suggestions(user_input.split(" ", 1)[1].strip())
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"Fehler: {e}")
+                continue
+            print(", ".join(suggestions) if suggestions else "Keine Vorschläge.")
+            continue
+
+        if user_input.startswith("batch "):
+            current_links = fetch_and_render_batch(user_input.split()[1:])
+            continue
+
         if user_input.startswith(("http://", "https://", "homepage://")):
             processed_url = user_input
         elif user_input.startswith("/"):
@@ -1,20 +1,69 @@
-from flask import Flask, jsonify, send_from_directory, request, Response
+from flask import Flask, jsonify, send_from_directory, send_file, request, Response, g
+from werkzeug.security import safe_join
 import os
 import json
 import re
+import gc
 import requests
 import time
+import math
+import heapq
+import threading
+import sys
+import mmap
+import struct
+import gzip
+import hashlib
+import multiprocessing
+import queue
+import mimetypes
+import zlib
+from array import array
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from urllib.parse import quote, unquote
+from werkzeug.http import unquote_etag
+from bisect import bisect_left, insort
+from itertools import islice, groupby
+
+try:
+    from PIL import Image, ImageOps, UnidentifiedImageError
+except ImportError:
+    Image = None
 
 app = Flask(__name__)
 
 websites_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), "websites"))
+wiki_folder = os.path.join(websites_folder, 'maxipedia')
 images_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), "images"))
 
-WEBSITES_DATA = {}
-WIKI_DATA = {}
+SNAPSHOT = {"generation": 0, "websites": None, "wiki": None, "digest": "", "suggest": None}
+TERM_IDS = {}
+TERMS = []
+_reload_lock = threading.Lock()
+_image_etags = {}
+_image_cache_lock = threading.Lock()
+_image_cache = OrderedDict()
+_image_cache_state = {"bytes": 0}
+_image_jobs = {}
+_image_directories = {}
+_query_cache_lock = threading.Lock()
+_query_cache = OrderedDict()
+_query_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_metrics_lock = threading.Lock()
+_metrics = {"started": time.time(), "routes": {}, "dropped_log_lines": 0, "shards": {}, "image_errors": {"count": 0, "last": None}}
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+RESPONSE_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+SNAPSHOT_MAGIC = b"SCBSNAP\0"
+SNAPSHOT_FORMAT_VERSION = 8
+SNAPSHOT_HEADER = struct.Struct("<8sIQQ")
 
 def load_server_config():
     config_path = os.path.join(os.path.dirname(__file__), "server_config.json")
+    if "--config" in sys.argv[:-1]:
+        config_path = sys.argv[sys.argv.index("--config") + 1]
     if os.path.exists(config_path):
         with open(config_path, 'r') as f:
             return json.load(f)
@@ -22,56 +71,584 @@ def load_server_config():
 
 config = load_server_config()
 SERVER_KEY = config.get("key", "")
+PORT = config.get("port", 5000)
+DEBUG = config.get("debug", True)
+BM25_K1 = config.get("bm25_k1", 1.2)
+BM25_B = config.get("bm25_b", 0.75)
+BM25_TAG_WEIGHT = config.get("bm25_tag_weight", 2.0)
+RELOAD_INTERVAL = config.get("reload_interval", 0)
+SHARD_INDEX = config.get("shard", {}).get("index", 0)
+SHARD_COUNT = config.get("shard", {}).get("count", 1)
+SHARD_URLS = [url.rstrip("/") for url in config.get("shards", [])]
+SHARD_TIMEOUT = config.get("shard_timeout", 2.0)
+COORDINATOR_MODE = bool(SHARD_URLS)
+DEFAULT_SNAPSHOT_NAME = f"corpus.shard{SHARD_INDEX}of{SHARD_COUNT}.snapshot" if SHARD_COUNT > 1 else "corpus.snapshot"
+SNAPSHOT_PATH = config.get("snapshot_path", os.path.join(os.path.dirname(__file__), DEFAULT_SNAPSHOT_NAME))
+PARSE_WORKERS = config.get("parse_workers") or os.cpu_count() or 1
+PARALLEL_PARSE_THRESHOLD = config.get("parallel_parse_threshold", 1000)
+PAGE_MAX_AGE = config.get("page_max_age", 60)
+SEARCH_MAX_AGE = config.get("search_max_age", 30)
+IMAGE_MAX_AGE = config.get("image_max_age", 86400)
+IMAGE_CACHE_FOLDER = config.get("image_cache_folder", os.path.join(os.path.dirname(__file__), "image_cache"))
+IMAGE_CACHE_MAX_BYTES = config.get("image_cache_max_bytes", 256 * 1024 * 1024)
+IMAGE_MAX_DIMENSION = config.get("image_max_dimension", 4096)
+IMAGE_WORKERS = config.get("image_workers") or os.cpu_count() or 1
+IMAGE_FITS = ("contain", "cover", "fill")
+ACCESS_LOG_PATH = config.get("access_log", "-")
+ACCESS_LOG_FLUSH_INTERVAL = config.get("access_log_flush_interval", 1.0)
+ACCESS_LOG_BUFFER = config.get("access_log_buffer", 10000)
+BATCH_MAX_REQUESTS = config.get("batch_max_requests", 50)
+QUERY_CACHE_SIZE = config.get("query_cache_size", 1024)
+QUERY_CACHE_MAX_RESULTS = config.get("query_cache_max_results", 1000)
+SUGGEST_LIMIT = config.get("suggest_limit", 10)
+SUGGEST_PRECOMPUTED_PREFIX = 2
+SNIPPET_WORDS = config.get("snippet_words", 30)
+SNIPPET_CONTEXT_WORDS = 5
+WORD_PATTERN = re.compile(r"\S*?\w\S*")
+BATCH_PREFIXES = ("/website/", "/raw/", "/search/", "/wiki_search/")
+PRODUCTION_MODE = __name__ == '__main__' and "--production" in sys.argv
+PRODUCTION_THREADS = config.get("production", {}).get("threads", 4)
+ADMISSION = config.get("admission", {})
+ADMISSION_MAX_CONCURRENT = ADMISSION.get("max_concurrent", PRODUCTION_THREADS if PRODUCTION_MODE else (os.cpu_count() or 1) * 8)
+ADMISSION_MAX_QUEUE = ADMISSION.get("max_queue", 64)
+ADMISSION_QUEUE_TIMEOUT = ADMISSION.get("queue_timeout", 1.0)
+ADMISSION_RETRY_AFTER = ADMISSION.get("retry_after", 1)
+ADMISSION_EXEMPT_ROUTES = ("/metrics",)
+ADMISSION_ENVIRON_KEY = "server.admission_gates"
+EXPENSIVE_ROUTES = ("/search", "/wiki_search", "/batch")
+ROUTE_CONCURRENCY = {
+    "/search": max(1, (PRODUCTION_THREADS - 1) // 2) if PRODUCTION_MODE else (os.cpu_count() or 1) * 2,
+    "/wiki_search": max(1, (PRODUCTION_THREADS - 1) // 2) if PRODUCTION_MODE else (os.cpu_count() or 1) * 2,
+    "/batch": max(1, (PRODUCTION_THREADS - 1) // 4) if PRODUCTION_MODE else os.cpu_count() or 1,
+    **ADMISSION.get("routes", {})
+}
+ROUTE_PRIORITY = {
+    "/website": 0, "/raw": 0, "/images": 0, "/suggest": 0,
+    "/search": 2, "/wiki_search": 2, "/batch": 2, "/corpus_stats": 2,
+    **ADMISSION.get("priority", {})
+}
+DEFAULT_ROUTE_PRIORITY = 1
+RATE_LIMITS = ADMISSION.get("rate_limit", {})
+RATE_LIMIT_MAX_CLIENTS = 10000
+
+class PageRecord:
+    __slots__ = (
+        "tag_ids", "term_ids", "word_offsets", "content",
+        "website_body", "website_gzip", "website_etag", "raw_gzip", "raw_etag"
+    )
+
+    def __init__(self, tag_ids, term_ids, word_offsets, content, website_body, website_gzip, website_etag, raw_gzip, raw_etag):
+        self.tag_ids = tag_ids
+        self.term_ids = term_ids
+        self.word_offsets = word_offsets
+        self.content = content
+        self.website_body = website_body
+        self.website_gzip = website_gzip
+        self.website_etag = website_etag
+        self.raw_gzip = raw_gzip
+        self.raw_etag = raw_etag
+
+def _intern_term(term):
+    term_id = TERM_IDS.get(term)
+    if term_id is None:
+        term_id = TERM_IDS[term] = len(TERMS)
+        TERMS.append(term)
+    return term_id
+
+def _make_page_record(tags, words, word_offsets, content, *bodies):
+    tag_ids = array("I", [_intern_term(tag) for tag in tags])
+    term_ids = array("I", [_intern_term(word) for word in words])
+    return PageRecord(tag_ids, term_ids, word_offsets, content, *bodies)
+
+def _word_offsets(content, words):
+    offsets = array("I", [match.start() for match in WORD_PATTERN.finditer(content or "")])
+    return offsets if len(offsets) == len(words) else array("I")
+
+def _dump_json(value):
+    return json.dumps(value, separators=(",", ":"), sort_keys=True).encode()
+
+def _content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _compress_body(body):
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+def _serialize_page(url, tags, words, content, source_code):
+    website_body = b"".join((
+        b'{"content":', _dump_json(content),
+        b',"source_code":', source_code,
+        b',"tags":', _dump_json(tags),
+        b',"url":', _dump_json(url), b'}\n'
+    ))
+    website_gzip = _compress_body(website_body)
+    # /raw repeats the content and adds every content word, so only its gzip form is kept:
+    # storing it uncompressed as well roughly doubled the resident corpus.
+    raw_body = b"".join((
+        b'{"content":', _dump_json(content),
+        b',"content_words":', _dump_json(words),
+        b',"source_code":', source_code,
+        b',"tags":', _dump_json(tags), b'}\n'
+    ))
+    return (
+        website_body, website_gzip if len(website_gzip) < len(website_body) else None, _content_hash(website_body),
+        _compress_body(raw_body), _content_hash(raw_body)
+    )
+
+def _empty_search_index():
+    return {
+        "urls": [],
+        "doc_ids": {},
+        "doc_count": 0,
+        "tags": {},
+        "content": {},
+        "lengths": {"tags": array("I"), "content": array("I")},
+        "total_lengths": {"tags": 0, "content": 0}
+    }
+
+def _page_fields(page):
+    return (("tags", page.tag_ids), ("content", page.term_ids))
+
+def _update_search_index(index, changes):
+    index = {
+        "urls": list(index["urls"]),
+        "doc_ids": dict(index["doc_ids"]),
+        "doc_count": index["doc_count"],
+        "tags": dict(index["tags"]),
+        "content": dict(index["content"]),
+        "lengths": {field: array("I", lengths) for field, lengths in index["lengths"].items()},
+        "total_lengths": dict(index["total_lengths"])
+    }
+    copied_postings = {"tags": set(), "content": set()}
+
+    def writable_postings(field, term_id):
+        if term_id not in copied_postings[field]:
+            doc_ids, frequencies = index[field].get(term_id, ((), ()))
+            index[field][term_id] = (array("I", doc_ids), array("I", frequencies))
+            copied_postings[field].add(term_id)
+        return index[field][term_id]
+
+    for url, old_page, new_page in changes:
+        doc_id = index["doc_ids"].get(url)
+        if old_page is not None and doc_id is not None:
+            for field, term_ids in _page_fields(old_page):
+                for term_id in set(term_ids):
+                    doc_ids, frequencies = writable_postings(field, term_id)
+                    position = bisect_left(doc_ids, doc_id)
+                    if position < len(doc_ids) and doc_ids[position] == doc_id:
+                        del doc_ids[position]
+                        del frequencies[position]
+                    if not doc_ids:
+                        del index[field][term_id]
+                        copied_postings[field].discard(term_id)
+                index["total_lengths"][field] -= index["lengths"][field][doc_id]
+                index["lengths"][field][doc_id] = 0
+            if new_page is None:
+                del index["doc_ids"][url]
+                index["urls"][doc_id] = None
+                index["doc_count"] -= 1
+
+        if new_page is not None:
+            if doc_id is None:
+                doc_id = len(index["urls"])
+                index["doc_ids"][url] = doc_id
+                index["urls"].append(url)
+                index["doc_count"] += 1
+                for lengths in index["lengths"].values():
+                    lengths.append(0)
+            for field, term_ids in _page_fields(new_page):
+                index["lengths"][field][doc_id] = len(term_ids)
+                index["total_lengths"][field] += len(term_ids)
+                for term_id, frequency in Counter(term_ids).items():
+                    doc_ids, frequencies = writable_postings(field, term_id)
+                    if not doc_ids or doc_ids[-1] < doc_id:
+                        doc_ids.append(doc_id)
+                        frequencies.append(frequency)
+                    else:
+                        position = bisect_left(doc_ids, doc_id)
+                        doc_ids.insert(position, doc_id)
+                        frequencies.insert(position, frequency)
+
+    return index
+
+def _build_search_index(dataset, urls=None):
+    if urls is None:
+        urls = dataset.keys()
+    return _update_search_index(_empty_search_index(), [(url, None, dataset[url]) for url in urls])
+
+def _build_url_index(dataset):
+    return sorted(url[::-1] for url in dataset)
+
+def _update_url_index(url_index, removed_urls, added_urls):
+    url_index = list(url_index)
+    for url in removed_urls:
+        position = bisect_left(url_index, url[::-1])
+        if position < len(url_index) and url_index[position] == url[::-1]:
+            del url_index[position]
+    for url in added_urls:
+        insort(url_index, url[::-1])
+    return url_index
+
+def _load_page_file(filepath, label):
+    try:
+        with open(filepath, "r") as f:
+            page_content = json.load(f)
+
+        url = page_content.get("url")
+        if url:
+            cleaned_content = re.sub(r'[^\w\s]', '', page_content.get("content", "").lower())
+            tags = [tag.lower() for tag in page_content.get("tags", [])]
+            words = cleaned_content.split()
+            content = page_content.get("content")
+            source_code = _dump_json(page_content.get("source_code"))
+
+            word_offsets = _word_offsets(content if isinstance(content, str) else "", words)
+            return url, (tags, words, word_offsets, content) + _serialize_page(url, tags, words, content, source_code)
+    except (OSError, json.JSONDecodeError, KeyError) as e:
+        print(f"Error processing {label} {os.path.basename(filepath)}: {e}")
+    return None, None
+
+def _in_shard(filename):
+    return SHARD_COUNT <= 1 or zlib.crc32(filename.encode()) % SHARD_COUNT == SHARD_INDEX
+
+def _scan_folder(folder):
+    file_stats = {}
+    if os.path.isdir(folder):
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file() and _in_shard(entry.name):
+                    stat = entry.stat()
+                    file_stats[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return file_stats
+
+def _parse_page_files(filepaths, label, parallel=False):
+    if not parallel or PARSE_WORKERS < 2 or len(filepaths) < PARALLEL_PARSE_THRESHOLD:
+        return [_load_page_file(filepath, label) for filepath in filepaths]
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return [_load_page_file(filepath, label) for filepath in filepaths]
+
+    chunksize = max(1, len(filepaths) // (PARSE_WORKERS * 4))
+    with ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("fork")) as executor:
+        return list(executor.map(_load_page_file, filepaths, [label] * len(filepaths), chunksize=chunksize))
+
+def _refresh_collection(collection, folder, label, parallel=False):
+    if collection is None:
+        collection = {"data": {}, "index": _empty_search_index(), "url_index": [], "files": {}}
+
+    file_stats = _scan_folder(folder)
+    files = {}
+    stale_entries = []
+    fresh_entries = []
+    changed_paths = []
+
+    for filepath, stat in file_stats.items():
+        entry = collection["files"].get(filepath)
+        if entry is not None and entry["stat"] == stat:
+            files[filepath] = entry
+            continue
+        if entry is not None:
+            stale_entries.append(entry)
+        changed_paths.append(filepath)
+
+    for filepath, (url, fields) in zip(changed_paths, _parse_page_files(changed_paths, label, parallel)):
+        page = _make_page_record(*fields) if url else None
+        files[filepath] = {"stat": file_stats[filepath], "url": url, "page": page}
+        if url:
+            fresh_entries.append(files[filepath])
+
+    for filepath, entry in collection["files"].items():
+        if filepath not in file_stats:
+            stale_entries.append(entry)
+
+    if not stale_entries and not fresh_entries:
+        if len(files) == len(collection["files"]):
+            return collection, 0
+        return dict(collection, files=files), 0
+
+    affected_urls = dict.fromkeys(entry["url"] for entry in stale_entries + fresh_entries if entry["url"])
+    winners = {}
+    for entry in files.values():
+        if entry["url"] in affected_urls and entry["page"] is not None:
+            winners[entry["url"]] = entry["page"]
+
+    old_data = collection["data"]
+    data = dict(old_data)
+    for url in affected_urls:
+        if url in winners:
+            data[url] = winners[url]
+        else:
+            data.pop(url, None)
+
+    changes = []
+    for url in affected_urls:
+        old_page, new_page = old_data.get(url), data.get(url)
+        if old_page is not new_page:
+            changes.append((url, old_page, new_page))
+
+    index = _update_search_index(collection["index"], changes)
+    if len(index["urls"]) > 2 * index["doc_count"] + 64:
+        index = _build_search_index(data, [url for url in index["urls"] if url is not None])
+
+    removed_urls = [url for url, old_page, new_page in changes if new_page is None]
+    added_urls = [url for url, old_page, new_page in changes if old_page is None]
+    url_index = _update_url_index(collection["url_index"], removed_urls, added_urls)
+
+    return {"data": data, "index": index, "url_index": url_index, "files": files}, len(changes)
+
+def _corpus_digest(*collections):
+    digests = []
+    for collection in collections:
+        digest = 0
+        for page in collection["data"].values():
+            digest ^= int(page.website_etag, 16)
+        digests.append(f"{digest:032x}")
+    return "-".join(digests)
+
+def _build_suggest_index(*collections):
+    frequencies = Counter()
+    for collection in collections:
+        for field in ("tags", "content"):
+            for term_id, postings in collection["index"][field].items():
+                frequencies[term_id] += len(postings[0])
+
+    ranked_terms = sorted((TERMS[term_id], frequency) for term_id, frequency in frequencies.items())
+    terms = [term for term, frequency in ranked_terms]
+    counts = array("I", [frequency for term, frequency in ranked_terms])
+
+    top = {}
+    for length in range(1, SUGGEST_PRECOMPUTED_PREFIX + 1):
+        positions = (position for position, term in enumerate(terms) if len(term) >= length)
+        for prefix, group in groupby(positions, key=lambda position: terms[position][:length]):
+            top[prefix] = tuple(heapq.nlargest(SUGGEST_LIMIT, group, key=counts.__getitem__))
+    return {"terms": terms, "counts": counts, "top": top}
+
+def _make_snapshot(generation, websites, wiki):
+    return {
+        "generation": generation,
+        "websites": websites,
+        "wiki": wiki,
+        "digest": _corpus_digest(websites, wiki),
+        "suggest": _build_suggest_index(websites, wiki)
+    }
+
+def reload_data(parallel=False):
+    global SNAPSHOT
+
+    with _reload_lock:
+        snapshot = SNAPSHOT
+        websites, website_changes = _refresh_collection(snapshot["websites"], websites_folder, "file", parallel)
+        wiki, wiki_changes = _refresh_collection(snapshot["wiki"], wiki_folder, "wiki file", parallel)
+
+        changed = website_changes + wiki_changes
+        if changed or snapshot["websites"] is None:
+            SNAPSHOT = _make_snapshot(snapshot["generation"] + 1, websites, wiki)
+        elif websites is not snapshot["websites"] or wiki is not snapshot["wiki"]:
+            SNAPSHOT = dict(snapshot, websites=websites, wiki=wiki)
+        return changed
+
+def _snapshot_layout():
+    return {"byteorder": sys.byteorder, "itemsize": array("I").itemsize}
+
+def _collection_state(collection, add_section):
+    data = collection["data"]
+    index = collection["index"]
+    return {
+        "pages": [
+            [
+                url, add_section(page.tag_ids), add_section(page.term_ids), add_section(page.word_offsets),
+                add_section(_dump_json(page.content)), add_section(page.website_body),
+                add_section(page.website_gzip) if page.website_gzip is not None else None,
+                page.website_etag, add_section(page.raw_gzip), page.raw_etag
+            ]
+            for url, page in data.items()
+        ],
+        "urls": index["urls"],
+        "postings": {
+            field: [[term_id, add_section(doc_ids), add_section(frequencies)] for term_id, (doc_ids, frequencies) in index[field].items()]
+            for field in ("tags", "content")
+        },
+        "lengths": {field: add_section(lengths) for field, lengths in index["lengths"].items()},
+        "total_lengths": index["total_lengths"],
+        "files": [
+            [filepath, entry["stat"], entry["url"], entry["page"] is not None and data.get(entry["url"]) is entry["page"]]
+            for filepath, entry in collection["files"].items()
+        ]
+    }
+
+def _collection_from_state(state, read_array, read_bytes):
+    data = {
+        url: PageRecord(
+            read_array(tag_ids), read_array(term_ids), read_array(word_offsets), json.loads(read_bytes(content)),
+            read_bytes(website_body), read_bytes(website_gzip) if website_gzip is not None else None,
+            website_etag, read_bytes(raw_gzip), raw_etag
+        )
+        for url, tag_ids, term_ids, word_offsets, content, website_body, website_gzip, website_etag, raw_gzip, raw_etag in state["pages"]
+    }
+    urls = state["urls"]
+    doc_ids = {url: doc_id for doc_id, url in enumerate(urls) if url is not None}
+    index = {
+        "urls": urls,
+        "doc_ids": doc_ids,
+        "doc_count": len(doc_ids),
+        "lengths": {field: read_array(section) for field, section in state["lengths"].items()},
+        "total_lengths": state["total_lengths"]
+    }
+    for field, postings in state["postings"].items():
+        index[field] = {term_id: (read_array(doc_ids), read_array(frequencies)) for term_id, doc_ids, frequencies in postings}
+    files = {
+        filepath: {"stat": tuple(stat), "url": url, "page": data[url] if owns_page else None}
+        for filepath, stat, url, owns_page in state["files"]
+    }
+    return {"data": data, "index": index, "url_index": _build_url_index(data), "files": files}
+
+def save_snapshot(snapshot, path):
+    sections = []
+
+    def add_section(buffer):
+        sections.append(buffer)
+        return len(sections) - 1
+
+    metadata = _dump_json({
+        "layout": _snapshot_layout(),
+        "terms": TERMS,
+        "websites": _collection_state(snapshot["websites"], add_section),
+        "wiki": _collection_state(snapshot["wiki"], add_section)
+    })
+    offsets = array("Q", [0])
+    for section in sections:
+        offsets.append(offsets[-1] + memoryview(section).nbytes)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(metadata), len(sections)))
+        f.write(metadata)
+        f.write(offsets)
+        for section in sections:
+            f.write(section)
+    os.replace(temp_path, path)
+
+def load_snapshot(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            magic, version, metadata_size, section_count = SNAPSHOT_HEADER.unpack_from(mapped)
+            table_start = SNAPSHOT_HEADER.size + metadata_size
+            data_start = table_start + (section_count + 1) * array("Q").itemsize
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_FORMAT_VERSION:
+                print(f"Ignoring corpus snapshot {path}: unsupported format")
+                return None
+            if data_start > len(mapped):
+                print(f"Ignoring corpus snapshot {path}: truncated file")
+                return None
+            metadata = json.loads(mapped[SNAPSHOT_HEADER.size:table_start])
+            if metadata["layout"] != _snapshot_layout():
+                print(f"Ignoring corpus snapshot {path}: built on a different platform")
+                return None
+            offsets = array("Q")
+            offsets.frombytes(view[table_start:data_start])
+            if data_start + offsets[-1] != len(mapped):
+                print(f"Ignoring corpus snapshot {path}: truncated file")
+                return None
+
+            def read_bytes(section):
+                return mapped[data_start + offsets[section]:data_start + offsets[section + 1]]
+
+            def read_array(section):
+                values = array("I")
+                values.frombytes(view[data_start + offsets[section]:data_start + offsets[section + 1]])
+                return values
+
+            return {
+                "terms": metadata["terms"],
+                "websites": _collection_from_state(metadata["websites"], read_array, read_bytes),
+                "wiki": _collection_from_state(metadata["wiki"], read_array, read_bytes)
+            }
+    except (OSError, ValueError, KeyError, IndexError, TypeError, struct.error) as e:
+        print(f"Ignoring corpus snapshot {path}: {e}")
+        return None
 
 def load_all_data():
-    global WEBSITES_DATA
-    global WIKI_DATA
-    
+    global SNAPSHOT, TERMS, TERM_IDS
     print("Loading all website data into memory...")
 
-    for website_file in os.listdir(websites_folder):
-        filepath = os.path.join(websites_folder, website_file)
-        if os.path.isfile(filepath) and not filepath.endswith('maxipedia'):
-            try:
-                with open(filepath, "r") as f:
-                    website_content = json.load(f)
-                
-                url = website_content.get("url")
-                if url:
-                    cleaned_content = re.sub(r'[^\w\s]', '', website_content.get("content", "").lower())
-                    
-                    WEBSITES_DATA[url] = {
-                        "tags": [tag.lower() for tag in website_content.get("tags", [])],
-                        "content_words": cleaned_content.split(),
-                        "content": website_content.get("content"),
-                        "source_code": website_content.get("source_code")
-                    }
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"Error processing file {website_file}: {e}")
-
-    wiki_folder = os.path.join(websites_folder, 'maxipedia')
-    if os.path.isdir(wiki_folder):
-        for wiki_file in os.listdir(wiki_folder):
-            filepath = os.path.join(wiki_folder, wiki_file)
-            if os.path.isfile(filepath):
-                try:
-                    with open(filepath, 'r') as f:
-                        wiki_content = json.load(f)
-                    
-                    url = wiki_content.get("url")
-                    if url:
-                        cleaned_content = re.sub(r'[^\w\s]', '', wiki_content.get("content", "").lower())
-                        
-                        WIKI_DATA[url] = {
-                            "tags": [tag.lower() for tag in wiki_content.get("tags", [])],
-                            "content_words": cleaned_content.split(),
-                            "content": wiki_content.get("content"),
-                            "source_code": wiki_content.get("source_code")
-                        }
-                except (json.JSONDecodeError, KeyError) as e:
-                    print(f"Error processing wiki file {wiki_file}: {e}")
-
-load_all_data()
+    stored = load_snapshot(SNAPSHOT_PATH) if SNAPSHOT_PATH else None
+    if stored is not None:
+        with _reload_lock:
+            TERMS = stored["terms"]
+            TERM_IDS = {term: term_id for term_id, term in enumerate(TERMS)}
+            SNAPSHOT = _make_snapshot(1, stored["websites"], stored["wiki"])
+
+    changed = reload_data()
+    if stored is not None:
+        print(f"Loaded corpus snapshot {SNAPSHOT_PATH} ({changed} stale pages re-read)")
+
+    if SNAPSHOT_PATH and (stored is None or SNAPSHOT["websites"] is not stored["websites"] or SNAPSHOT["wiki"] is not stored["wiki"]):
+        try:
+            save_snapshot(SNAPSHOT, SNAPSHOT_PATH)
+        except OSError as e:
+            print(f"Error writing corpus snapshot {SNAPSHOT_PATH}: {e}")
+
+def rebuild_snapshot():
+    global SNAPSHOT
+    with _reload_lock:
+        SNAPSHOT = {"generation": SNAPSHOT["generation"], "websites": None, "wiki": None, "digest": "", "suggest": None}
+    reload_data(parallel=True)
+    save_snapshot(SNAPSHOT, SNAPSHOT_PATH)
+
+def _reload_periodically():
+    while True:
+        time.sleep(RELOAD_INTERVAL)
+        try:
+            changed = reload_data()
+            if changed:
+                print(f"Reloaded {changed} changed pages (generation {SNAPSHOT['generation']})")
+        except Exception as e:
+            print(f"Error reloading website data: {e}")
+
+if __name__ == '__main__' and "--build-snapshot" in sys.argv:
+    rebuild_snapshot()
+    print(f"Corpus snapshot written to {SNAPSHOT_PATH}")
+    sys.exit()
+
+if not COORDINATOR_MODE:
+    load_all_data()
+
+_access_log_queue = queue.Queue(maxsize=ACCESS_LOG_BUFFER)
+
+def _flush_access_log():
+    records = []
+    while True:
+        try:
+            records.append(_access_log_queue.get_nowait())
+        except queue.Empty:
+            break
+    if not records:
+        return
+
+    lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+    if ACCESS_LOG_PATH == "-":
+        sys.stdout.write(lines)
+        sys.stdout.flush()
+    else:
+        with open(ACCESS_LOG_PATH, "a") as f:
+            f.write(lines)
+
+def _write_access_log_periodically():
+    while True:
+        time.sleep(ACCESS_LOG_FLUSH_INTERVAL)
+        try:
+            _flush_access_log()
+        except OSError as e:
+            print(f"Error writing access log: {e}")
+
+def start_background_threads():
+    if RELOAD_INTERVAL > 0 and not COORDINATOR_MODE:
+        threading.Thread(target=_reload_periodically, daemon=True).start()
+    if ACCESS_LOG_PATH:
+        threading.Thread(target=_write_access_log_periodically, daemon=True).start()
+
+if not PRODUCTION_MODE:
+    start_background_threads()
 
 print("-"*80)
 print(f"Server key loaded: {SERVER_KEY}")
@@ -79,109 +656,1044 @@ print("-"*80)
 
 @app.before_request
 def check_auth():
-    print("-"*80)
-    print(f"Connection from IP: {request.remote_addr}, requested URL: {request.url}")
+    g.request_started = time.perf_counter()
 
-    if request.path.startswith("/images") or request.path.startswith("/website") or request.path.startswith("/search"):
+    if request.path.startswith(("/images", "/website", "/search", "/suggest", "/reload", "/metrics", "/batch", "/corpus_stats")):
         client_key = request.headers.get("X-API-Key")
-        print(f"Client key received: '{client_key}'")
         if client_key != SERVER_KEY or not SERVER_KEY:
             return jsonify({"error": "Unauthorized"}), 401
-    print("-"*80)
 
-def _search_for_tags(search_terms, tags, url, scores):
-    normalized_search_terms = [term.lower() for term in search_terms]
-    for term in normalized_search_terms:
-        if term in tags:
-            scores[url] += 1
+class AdmissionGate:
+    def __init__(self, limit, max_queue):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = []
+        self.sequence = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, priority, deadline):
+        with self.lock:
+            if self.active < self.limit and not self.waiting:
+                self.active += 1
+                return True
+            if len(self.waiting) >= self.max_queue:
+                self.rejected += 1
+                return False
+            waiter = (priority, self.sequence, threading.Event())
+            self.sequence += 1
+            heapq.heappush(self.waiting, waiter)
+
+        if waiter[2].wait(max(0.0, deadline - time.perf_counter())):
+            return True
+        with self.lock:
+            if waiter[2].is_set():
+                return True
+            self.waiting.remove(waiter)
+            heapq.heapify(self.waiting)
+            self.rejected += 1
+            return False
+
+    def release(self):
+        with self.lock:
+            if self.waiting:
+                heapq.heappop(self.waiting)[2].set()
+            else:
+                self.active -= 1
+
+    def stats(self):
+        with self.lock:
+            return {"limit": self.limit, "active": self.active, "queued": len(self.waiting), "rejected": self.rejected}
+
+class TokenBuckets:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = OrderedDict()
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def take(self, client):
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self.buckets[client] = (tokens - 1, now)
+                wait_seconds = 0.0
+            else:
+                self.buckets[client] = (tokens, now)
+                self.rejected += 1
+                wait_seconds = (1 - tokens) / self.rate
+            while len(self.buckets) > RATE_LIMIT_MAX_CLIENTS:
+                self.buckets.popitem(last=False)
+            return wait_seconds
+
+    def stats(self):
+        with self.lock:
+            return {"rate": self.rate, "burst": self.burst, "clients": len(self.buckets), "rejected": self.rejected}
+
+_admission_gate = AdmissionGate(ADMISSION_MAX_CONCURRENT, ADMISSION_MAX_QUEUE) if ADMISSION_MAX_CONCURRENT else None
+_route_gates = {
+    route: AdmissionGate(limit, ADMISSION_MAX_QUEUE)
+    for route, limit in ROUTE_CONCURRENCY.items() if limit
+}
+_rate_limiters = {
+    kind: TokenBuckets(limits["rate"], limits.get("burst", limits["rate"]))
+    for kind, limits in RATE_LIMITS.items() if kind in ("ip", "key") and limits.get("rate")
+}
+
+def _shed(status_code, error, retry_after):
+    response = jsonify({"error": error})
+    response.status_code = status_code
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    response.cache_control.no_store = True
+    return response
+
+def _release_admission(gates):
+    for gate in reversed(gates):
+        gate.release()
+
+@app.before_request
+def admit_request():
+    route = "/" + request.path.split("/")[1]
+    if route in ADMISSION_EXEMPT_ROUTES:
+        return None
+
+    for kind, client in (("ip", request.remote_addr), ("key", request.headers.get("X-API-Key"))):
+        limiter = _rate_limiters.get(kind)
+        if limiter is not None and client:
+            wait_seconds = limiter.take(client)
+            if wait_seconds:
+                return _shed(429, "Too many requests", wait_seconds)
+
+    priority = ROUTE_PRIORITY.get(route, DEFAULT_ROUTE_PRIORITY)
+    deadline = time.perf_counter() + ADMISSION_QUEUE_TIMEOUT
+    gates = request.environ[ADMISSION_ENVIRON_KEY] = []
+    for gate in (_route_gates.get(route), _admission_gate):
+        if gate is None:
+            continue
+        if not gate.acquire(priority, deadline):
+            _release_admission(request.environ.pop(ADMISSION_ENVIRON_KEY))
+            return _shed(503, "Server busy", ADMISSION_RETRY_AFTER)
+        gates.append(gate)
+
+@app.after_request
+def release_admission_on_close(response):
+    if response.is_streamed and not response.direct_passthrough:
+        gates = request.environ.pop(ADMISSION_ENVIRON_KEY, None)
+        if gates:
+            response.call_on_close(lambda: _release_admission(gates))
+    return response
+
+@app.teardown_request
+def release_admission(exception):
+    gates = request.environ.pop(ADMISSION_ENVIRON_KEY, None)
+    if gates:
+        _release_admission(gates)
+
+def _new_route_metrics():
+    return {
+        "requests": 0,
+        "unauthorized": 0,
+        "server_errors": 0,
+        "status": {},
+        "latency_ms": {"sum": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)},
+        "response_bytes": {"sum": 0, "buckets": [0] * (len(RESPONSE_SIZE_BUCKETS) + 1)}
+    }
+
+def _record_metrics(route, status_code, duration_ms, response_bytes):
+    with _metrics_lock:
+        route_metrics = _metrics["routes"].get(route)
+        if route_metrics is None:
+            route_metrics = _metrics["routes"][route] = _new_route_metrics()
+
+        route_metrics["requests"] += 1
+        route_metrics["status"][status_code] = route_metrics["status"].get(status_code, 0) + 1
+        if status_code == 401:
+            route_metrics["unauthorized"] += 1
+        elif status_code >= 500:
+            route_metrics["server_errors"] += 1
+        route_metrics["latency_ms"]["sum"] += duration_ms
+        route_metrics["latency_ms"]["buckets"][bisect_left(LATENCY_BUCKETS_MS, duration_ms)] += 1
+        route_metrics["response_bytes"]["sum"] += response_bytes
+        route_metrics["response_bytes"]["buckets"][bisect_left(RESPONSE_SIZE_BUCKETS, response_bytes)] += 1
+
+@app.after_request
+def record_request(response):
+    started = g.get("request_started")
+    duration_ms = (time.perf_counter() - started) * 1000 if started is not None else 0.0
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    response_bytes = response.content_length or 0
+    _record_metrics(route, response.status_code, duration_ms, response_bytes)
+
+    if ACCESS_LOG_PATH:
+        record = {
+            "time": time.time(),
+            "remote_addr": request.remote_addr,
+            "method": request.method,
+            "path": request.full_path if request.query_string else request.path,
+            "route": route,
+            "status": response.status_code,
+            "duration_ms": round(duration_ms, 3),
+            "bytes": response_bytes
+        }
+        try:
+            _access_log_queue.put_nowait(record)
+        except queue.Full:
+            with _metrics_lock:
+                _metrics["dropped_log_lines"] += 1
+    return response
+
+def _histogram(histogram, bounds):
+    labels = [str(bound) for bound in bounds] + ["+Inf"]
+    buckets = [{"le": label, "count": count} for label, count in zip(labels, histogram["buckets"])]
+    return {"sum": histogram["sum"], "buckets": buckets}
+
+def _query_term_ids(search_terms):
+    term_ids = [TERM_IDS.get(term.lower()) for term in search_terms]
+    return [term_id for term_id in term_ids if term_id is not None]
+
+def _match_scores(index, search_terms):
+    scores = {}
+    for term_id in _query_term_ids(search_terms):
+        for field in ("tags", "content"):
+            postings = index[field].get(term_id)
+            if postings:
+                for doc_id in postings[0]:
+                    scores[doc_id] = scores.get(doc_id, 0) + 1
+    return scores
+
+def _bm25_scores(index, search_terms, corpus_stats=None):
+    scores = {}
+    doc_count = corpus_stats["doc_count"] if corpus_stats else index["doc_count"]
+    term_ids = _query_term_ids(search_terms)
+    for field, weight in (("tags", BM25_TAG_WEIGHT), ("content", 1.0)):
+        lengths = index["lengths"][field]
+        total_length = corpus_stats["total_lengths"][field] if corpus_stats else index["total_lengths"][field]
+        average_length = total_length / doc_count if doc_count else 0
+        for term_id in term_ids:
+            postings = index[field].get(term_id)
+            if not postings:
+                continue
+            doc_ids, frequencies = postings
+            document_frequency = len(doc_ids)
+            if corpus_stats:
+                document_frequency = corpus_stats["document_frequencies"][field].get(TERMS[term_id], document_frequency)
+            idf = math.log(1 + (doc_count - document_frequency + 0.5) / (document_frequency + 0.5))
+            for doc_id, frequency in zip(doc_ids, frequencies):
+                length_norm = 1 - BM25_B + BM25_B * lengths[doc_id] / average_length if average_length else 1
+                term_score = idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+                scores[doc_id] = scores.get(doc_id, 0) + weight * term_score
+    return scores
+
+def _corpus_stats(index, search_terms):
+    term_ids = set(_query_term_ids(search_terms))
+    return {
+        "doc_count": index["doc_count"],
+        "total_lengths": dict(index["total_lengths"]),
+        "document_frequencies": {
+            field: {TERMS[term_id]: len(index[field][term_id][0]) for term_id in term_ids if index[field].get(term_id)}
+            for field in ("tags", "content")
+        }
+    }
+
+def _merge_corpus_stats(shard_stats):
+    merged = {"doc_count": 0, "total_lengths": {"tags": 0, "content": 0}, "document_frequencies": {"tags": {}, "content": {}}}
+    for stats in shard_stats:
+        merged["doc_count"] += stats["doc_count"]
+        for field in ("tags", "content"):
+            merged["total_lengths"][field] += stats["total_lengths"][field]
+            frequencies = merged["document_frequencies"][field]
+            for term, frequency in stats["document_frequencies"][field].items():
+                frequencies[term] = frequencies.get(term, 0) + frequency
+    return merged
+
+def _valid_count(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+def _request_corpus_stats():
+    header = request.headers.get("X-Corpus-Stats")
+    if not header:
+        return None, None
+    try:
+        stats = json.loads(header)
+        valid = _valid_count(stats["doc_count"]) and all(
+            _valid_count(stats["total_lengths"][field])
+            and all(_valid_count(frequency) for frequency in stats["document_frequencies"][field].values())
+            for field in ("tags", "content")
+        )
+    except (ValueError, TypeError, KeyError, AttributeError):
+        valid = False
+    if not valid:
+        return None, "X-Corpus-Stats must be a JSON object with doc_count, total_lengths and document_frequencies"
+    return stats, None
+
+def _top_documents(index, scores, offset, limit):
+    rank_key = lambda item: (-item[1], item[0])
+    if limit is None:
+        ranked = sorted(scores.items(), key=rank_key)[offset:]
+    else:
+        ranked = heapq.nsmallest(offset + limit, scores.items(), key=rank_key)[offset:]
+    return [(index["urls"][doc_id], score) for doc_id, score in ranked]
+
+def _iter_top_documents(index, scores, offset, limit):
+    heap = [(-score, doc_id) for doc_id, score in scores.items()]
+    heapq.heapify(heap)
+    end = len(heap) if limit is None else min(len(heap), offset + limit)
+    for position in range(end):
+        score, doc_id = heapq.heappop(heap)
+        if position >= offset:
+            yield index["urls"][doc_id], -score
+
+def _get_paging_params():
+    limit = request.args.get("limit", type=int)
+    offset = request.args.get("offset", default=0, type=int)
+    if limit is not None:
+        limit = max(0, limit)
+    return limit, max(0, offset)
+
+def _snippet(page, term_ids):
+    content = page.content if isinstance(page.content, str) else ""
+    offsets = page.word_offsets
+    if not offsets:
+        return content if len(content.split()) <= SNIPPET_WORDS else " ".join(content.split()[:SNIPPET_WORDS]) + " ..."
+
+    hits = []
+    for term_id in term_ids:
+        position = 0
+        for _ in range(3):
+            try:
+                position = page.term_ids.index(term_id, position)
+            except ValueError:
+                break
+            hits.append(position)
+            position += 1
+    hits.sort()
+
+    start = 0
+    best_hits = 0
+    window_end = 0
+    for window_start, hit in enumerate(hits):
+        while window_end < len(hits) and hits[window_end] < hit + SNIPPET_WORDS - SNIPPET_CONTEXT_WORDS:
+            window_end += 1
+        if window_end - window_start > best_hits:
+            best_hits = window_end - window_start
+            start = max(0, hit - SNIPPET_CONTEXT_WORDS)
+
+    start = max(0, min(start, len(offsets) - SNIPPET_WORDS))
+    end = start + SNIPPET_WORDS
+    snippet = content[offsets[start] if start else 0:offsets[end] if end < len(offsets) else len(content)].strip()
+    if start:
+        snippet = "... " + snippet
+    if end < len(offsets):
+        snippet += " ..."
+    return snippet
+
+def _search_dataset(collection, query, lazy=False, corpus_stats=None):
+    dataset = collection["data"]
+    index = collection["index"]
+    terms = query.split()
+    limit, offset = _get_paging_params()
+    if not query:
+        total = index["doc_count"]
+        end = None if limit is None else offset + limit
+        page = islice(((url, None) for url in index["urls"] if url is not None), offset, end)
+    else:
+        if request.args.get("rank") == "bm25":
+            scores = _bm25_scores(index, terms, corpus_stats)
+        else:
+            scores = _match_scores(index, terms)
+        total = len(scores)
+        if lazy:
+            page = _iter_top_documents(index, scores, offset, limit)
+        else:
+            page = _top_documents(index, scores, offset, limit)
+
+    term_ids = set(_query_term_ids(terms))
+    full = request.args.get("full") == "1"
+    with_scores = request.args.get("scores") == "1"
+    results = (_search_result(dataset[url], url, score, term_ids, full, with_scores) for url, score in page)
+    return (results if lazy else list(results)), total
+
+def _search_result(page, url, score, term_ids, full, with_scores):
+    result = {"url": url, "snippet": _snippet(page, term_ids)}
+    if full:
+        result["content"] = page.content
+    if with_scores:
+        result["score"] = score
+    return result
+
+def _query_cache_key(name, query):
+    limit, offset = _get_paging_params()
+    terms = tuple(sorted(term.lower() for term in query.split()))
+    flags = tuple(request.args.get(flag) == "1" for flag in ("full", "scores"))
+    return (name, bool(query), terms, request.args.get("rank") == "bm25", flags, limit, offset)
+
+def _store_query_result(key, generation, results, total):
+    if len(results) > QUERY_CACHE_MAX_RESULTS or QUERY_CACHE_SIZE <= 0:
+        return
+    with _query_cache_lock:
+        _query_cache[key] = (generation, results, total)
+        _query_cache.move_to_end(key)
+        while len(_query_cache) > QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+            _query_cache_stats["evictions"] += 1
+
+def _caching_results(results, key, generation, total):
+    collected = []
+    for result in results:
+        collected.append(result)
+        yield result
+    _store_query_result(key, generation, collected, total)
+
+def _cached_search(snapshot, name, query, lazy=False, corpus_stats=None):
+    if corpus_stats is not None:
+        return _search_dataset(snapshot[name], query, lazy, corpus_stats)
+
+    key = _query_cache_key(name, query)
+    generation = snapshot["generation"]
+    with _query_cache_lock:
+        entry = _query_cache.get(key)
+        if entry is not None and entry[0] == generation:
+            _query_cache.move_to_end(key)
+            _query_cache_stats["hits"] += 1
+            return (iter(entry[1]) if lazy else entry[1]), entry[2]
+        _query_cache_stats["misses"] += 1
+
+    results, total = _search_dataset(snapshot[name], query, lazy)
+    if lazy:
+        return _caching_results(results, key, generation, total), total
+    _store_query_result(key, generation, results, total)
+    return results, total
+
+def _suggest_terms(suggest_index, prefix, limit):
+    if not prefix or limit <= 0:
+        return []
+    if len(prefix) <= SUGGEST_PRECOMPUTED_PREFIX:
+        best = suggest_index["top"].get(prefix, ())[:limit]
+    else:
+        terms = suggest_index["terms"]
+        start = bisect_left(terms, prefix)
+        end = bisect_left(terms, prefix + "\U0010ffff", start)
+        best = heapq.nlargest(limit, range(start, end), key=suggest_index["counts"].__getitem__)
+    return [(suggest_index["terms"][position], suggest_index["counts"][position]) for position in best]
+
+def _wants_stream():
+    if request.args.get("stream") in ("1", "true"):
+        return True
+    return request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"]) == "application/x-ndjson"
+
+def _set_cache_headers(response, max_age, etag=None, weak=False):
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    if etag is not None:
+        response.set_etag(etag, weak=weak)
+    return response
+
+def _not_modified(etag, max_age, weak=False):
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return _set_cache_headers(Response(status=304), max_age, etag, weak)
+
+def _page_response(body, gzip_body, etag):
+    use_gzip = gzip_body is not None and request.accept_encodings["gzip"]
+    if use_gzip:
+        etag = f"{etag}-gzip"
+
+    response = _not_modified(etag, PAGE_MAX_AGE)
+    if response is None:
+        if use_gzip:
+            response = Response(gzip_body, mimetype="application/json")
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = Response(body if body is not None else gzip.decompress(gzip_body), mimetype="application/json")
+        _set_cache_headers(response, PAGE_MAX_AGE, etag)
+    if gzip_body is not None:
+        response.vary.add("Accept-Encoding")
+    return response
+
+def _search_etag(snapshot, stream=False):
+    content_type = "ndjson" if stream else "json"
+    return _content_hash(f"{snapshot['digest']}:{content_type}:{request.full_path}".encode())
+
+def _image_etag(filename):
+    filepath = safe_join(images_folder, filename)
+    if filepath is None or not os.path.isfile(filepath):
+        return None
+
+    stat = os.stat(filepath)
+    return _file_content_hash(filepath, (stat.st_mtime_ns, stat.st_size))
+
+def _file_content_hash(filepath, file_state):
+    cached = _image_etags.get(filepath)
+    if cached is not None and cached[0] == file_state:
+        return cached[1]
+
+    file_hash = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            file_hash.update(chunk)
+    etag = file_hash.hexdigest()
+    _image_etags[filepath] = (file_state, etag)
+    return etag
+
+def _search_response(results, total, etag, stream=False):
+    if stream:
+        lines = (_dump_json(result) + b"\n" for result in results)
+        response = Response(lines, mimetype="application/x-ndjson")
+    else:
+        response = jsonify(results)
+    response.headers["X-Total-Count"] = str(total)
+    response.vary.add("Accept")
+    return _set_cache_headers(response, SEARCH_MAX_AGE, etag, weak=True)
+
+def _resolve_url(snapshot, url):
+    collections = (snapshot["websites"], snapshot["wiki"])
+    for collection in collections:
+        if url in collection["data"]:
+            return url, collection["data"][url]
+
+    reversed_url = url[::-1]
+    for collection in collections:
+        url_index = collection["url_index"]
+        position = bisect_left(url_index, reversed_url)
+        if position < len(url_index) and url_index[position].startswith(reversed_url):
+            site_url = url_index[position][::-1]
+            return site_url, collection["data"][site_url]
+
+    return None, None
+
+def _shard_page_response(snapshot, site_url, response):
+    if SHARD_COUNT > 1:
+        response.headers["X-Resolved-URL"] = quote(site_url)
+        response.headers["X-Collection"] = "websites" if site_url in snapshot["websites"]["data"] else "wiki"
+    return response
+
+_shard_sessions = threading.local()
+_shard_executor = ThreadPoolExecutor(max_workers=max(4, 4 * len(SHARD_URLS))) if COORDINATOR_MODE else None
+
+def _shard_request(shard_url, method, path, params, headers):
+    session = getattr(_shard_sessions, "session", None)
+    if session is None:
+        session = _shard_sessions.session = requests.Session()
+        session.headers["X-API-Key"] = SERVER_KEY
+    response = session.request(method, f"{shard_url}{path}", params=params, headers=headers, timeout=SHARD_TIMEOUT)
+    if response.status_code not in (200, 404):
+        response.raise_for_status()
+    return response
+
+def _record_shard_failure(shard_url, kind, error):
+    with _metrics_lock:
+        shard = _metrics["shards"].get(shard_url)
+        if shard is None:
+            shard = _metrics["shards"][shard_url] = {"timeouts": 0, "errors": 0, "last_error": None}
+        shard[kind] += 1
+        shard["last_error"] = error
+
+def _fan_out(path, params=None, headers=None, method="GET"):
+    futures = [_shard_executor.submit(_shard_request, shard_url, method, path, params, headers) for shard_url in SHARD_URLS]
+    done, not_done = wait(futures, timeout=SHARD_TIMEOUT)
+    responses = []
+    for shard_url, future in zip(SHARD_URLS, futures):
+        if future in not_done:
+            _record_shard_failure(shard_url, "timeouts", f"{path}: timed out")
+            responses.append(None)
+        elif future.exception() is not None:
+            _record_shard_failure(shard_url, "errors", f"{path}: {future.exception()}")
+            responses.append(None)
+        else:
+            responses.append(future.result())
+    return responses
+
+def _coordinated_search(name, query):
+    quoted_query = quote(query, safe="")
+    limit, offset = _get_paging_params()
+    params = {key: value for key, value in request.args.items() if key in ("rank", "full")}
+    params["scores"] = "1"
+    if limit is not None:
+        params["limit"] = offset + limit
+    headers = {"Accept": "application/json"}
+    failed = set()
+
+    if request.args.get("rank") == "bm25" and query.split():
+        stats_responses = _fan_out(f"/corpus_stats/{name}/{quoted_query}")
+        failed.update(shard for shard, response in enumerate(stats_responses) if response is None)
+        shard_stats = [response.json() for response in stats_responses if response is not None]
+        headers["X-Corpus-Stats"] = json.dumps(_merge_corpus_stats(shard_stats), separators=(",", ":"))
+
+    path = "/search/" if name == "websites" else "/wiki_search/"
+    hits = []
+    total = 0
+    for shard, response in enumerate(_fan_out(f"{path}{quoted_query}", params, headers)):
+        if response is None:
+            failed.add(shard)
+        elif response.status_code == 200:
+            total += int(response.headers.get("X-Total-Count", 0))
+            hits.extend((shard, position, result) for position, result in enumerate(response.json()))
+
+    if query.split():
+        hits.sort(key=lambda hit: (-hit[2]["score"], hit[0], hit[1]))
+    end = None if limit is None else offset + limit
+    results = [result for shard, position, result in hits[offset:end]]
+    if request.args.get("scores") != "1":
+        for result in results:
+            del result["score"]
+    return results, total, len(failed)
+
+def _coordinated_search_response(name, query):
+    results, total, failed = _coordinated_search(name, query)
+    if failed == len(SHARD_URLS):
+        return jsonify({"error": "No shard answered"}), 503
+    if name == "wiki" and not total and not failed:
+        return jsonify(), 404
+
+    response = _search_response(results, total, None, _wants_stream())
+    if failed:
+        response.headers["X-Shards-Failed"] = str(failed)
+        response.cache_control.max_age = None
+        response.cache_control.no_store = True
+    return response
+
+def _coordinated_page(path, url):
+    responses = _fan_out(f"{path}{quote(url)}", headers={"Accept-Encoding": "identity"})
+    candidates = []
+    for response in responses:
+        if response is not None and response.status_code == 200:
+            site_url = unquote(response.headers.get("X-Resolved-URL", ""))
+            collection_rank = 0 if response.headers.get("X-Collection") == "websites" else 1
+            candidates.append(((site_url != url, collection_rank, site_url[::-1]), response))
+
+    if not candidates:
+        if all(response is None for response in responses):
+            return jsonify({"error": "No shard answered"}), 503
+        return jsonify({"error": "Website not found"}), 404
+
+    rank, response = min(candidates, key=lambda candidate: candidate[0])
+    etag = unquote_etag(response.headers.get("ETag", ""))[0] or _content_hash(response.content)
+    return _page_response(response.content, None, etag)
+
+def _coordinated_suggestions(prefix, limit):
+    frequencies = Counter()
+    for response in _fan_out(f"/suggest/{quote(prefix, safe='')}", {"limit": limit, "frequencies": "1"}):
+        if response is not None and response.status_code == 200:
+            for term, frequency in response.json():
+                frequencies[term] += frequency
+    ranked = sorted(frequencies.items(), key=lambda item: (-item[1], item[0]))
+    return ranked[:limit]
+
+def _load_image_cache_index():
+    if not os.path.isdir(IMAGE_CACHE_FOLDER):
+        return
+    with os.scandir(IMAGE_CACHE_FOLDER) as entries:
+        cached_files = [entry for entry in entries if entry.is_file() and not entry.name.endswith(".tmp")]
+    cached_files.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in cached_files:
+        _remember_image_derivative(os.path.splitext(entry.name)[0], entry.path)
+
+def _remember_image_derivative(key, path):
+    size = os.path.getsize(path)
+    evicted = []
+    with _image_cache_lock:
+        previous = _image_cache.pop(key, None)
+        if previous is not None:
+            _image_cache_state["bytes"] -= previous[1]
+        _image_cache[key] = (path, size)
+        _image_cache_state["bytes"] += size
+        while _image_cache_state["bytes"] > IMAGE_CACHE_MAX_BYTES and len(_image_cache) > 1:
+            evicted_key, (evicted_path, evicted_size) = _image_cache.popitem(last=False)
+            _image_cache_state["bytes"] -= evicted_size
+            evicted.append(evicted_path)
+
+    for evicted_path in evicted:
+        try:
+            os.remove(evicted_path)
+        except OSError:
+            pass
 
-def _search_for_content(search_terms, content_words, url, scores):
-    normalized_search_terms = [term.lower() for term in search_terms]
-    for term in normalized_search_terms:
-        if term in content_words:
-            scores[url] += 1
+def _cached_image_derivative(key):
+    with _image_cache_lock:
+        cached = _image_cache.get(key)
+        if cached is None:
+            return None
+        if not os.path.exists(cached[0]):
+            del _image_cache[key]
+            _image_cache_state["bytes"] -= cached[1]
+            return None
+        _image_cache.move_to_end(key)
+        return cached[0]
+
+def _resize_image(image, width, height, fit):
+    source_width, source_height = image.size
+    if width and height:
+        if fit == "cover":
+            return ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+        if fit == "contain":
+            scale = min(width / source_width, height / source_height)
+            width = max(1, round(source_width * scale))
+            height = max(1, round(source_height * scale))
+    elif width:
+        height = max(1, int(width / (source_width / source_height)))
+    else:
+        width = max(1, int(height * (source_width / source_height)))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+def _render_image_derivative(source_path, key, width, height, fit):
+    with Image.open(source_path) as image:
+        if getattr(image, "is_animated", False):
+            return None
+        image_format = image.format if image.format in ("PNG", "JPEG", "WEBP", "BMP") else "PNG"
+        resized = _resize_image(image, width, height, fit)
+
+    if image_format == "JPEG" and resized.mode not in ("RGB", "L"):
+        resized = resized.convert("RGB")
+
+    os.makedirs(IMAGE_CACHE_FOLDER, exist_ok=True)
+    extension = "jpg" if image_format == "JPEG" else image_format.lower()
+    path = os.path.join(IMAGE_CACHE_FOLDER, f"{key}.{extension}")
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    resized.save(temp_path, format=image_format)
+    os.replace(temp_path, path)
+    _remember_image_derivative(key, path)
+    return path
+
+def _image_derivative(filename, width, height, fit):
+    source_etag = _image_etag(filename)
+    if source_etag is None:
+        return None, None
+
+    key = _content_hash(f"{source_etag}:{width}:{height}:{fit}".encode())
+    path = _cached_image_derivative(key)
+    if path is not None:
+        return path, key
+
+    source_path = safe_join(images_folder, filename)
+    source_width, source_height = _image_dimensions(source_path)
+    if source_width is None or Image.MAX_IMAGE_PIXELS and source_width * source_height > Image.MAX_IMAGE_PIXELS:
+        return None, None
+
+    with _image_cache_lock:
+        job = _image_jobs.get(key)
+        if job is None:
+            job = _image_jobs[key] = _image_executor.submit(_render_image_derivative, source_path, key, width, height, fit)
+            job.add_done_callback(lambda finished_job: _image_jobs.pop(key, None))
+
+    try:
+        return job.result(), key
+    except (OSError, ValueError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+        with _metrics_lock:
+            _metrics["image_errors"]["count"] += 1
+            _metrics["image_errors"]["last"] = f"{filename}: {e}"
+        return None, None
+
+def _requested_image_size():
+    width = request.args.get("width", type=int)
+    height = request.args.get("height", type=int)
+    fit = request.args.get("fit", "contain")
+    if width is None and height is None:
+        return None, None
+
+    for dimension in (width, height):
+        if dimension is not None and not 0 < dimension <= IMAGE_MAX_DIMENSION:
+            return None, f"Image dimensions must be between 1 and {IMAGE_MAX_DIMENSION}"
+    if fit not in IMAGE_FITS:
+        return None, f"fit must be one of: {', '.join(IMAGE_FITS)}"
+    return (width, height, fit), None
+
+if Image is not None:
+    _image_executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image-resize")
+    _load_image_cache_index()
+
+def _image_dimensions(filepath):
+    if Image is None:
+        return None, None
+    try:
+        with Image.open(filepath) as image:
+            return image.size
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        return None, None
+
+def _image_directory_entries(path):
+    directory_mtime = os.stat(path).st_mtime_ns
+    cached = _image_directories.get(path)
+    if cached is not None and cached["mtime"] == directory_mtime:
+        return cached["entries"]
+
+    previous_entries = {entry["name"]: entry for entry in cached["entries"]} if cached is not None else {}
+    entries = []
+    with os.scandir(path) as directory_entries:
+        for directory_entry in directory_entries:
+            if not directory_entry.is_file():
+                continue
+            stat = directory_entry.stat()
+            file_state = (stat.st_mtime_ns, stat.st_size)
+            previous = previous_entries.get(directory_entry.name)
+            if previous is not None and previous["_state"] == file_state:
+                entries.append(previous)
+                continue
+
+            width, height = _image_dimensions(directory_entry.path)
+            entries.append({
+                "name": directory_entry.name,
+                "width": width,
+                "height": height,
+                "bytes": stat.st_size,
+                "hash": _file_content_hash(directory_entry.path, file_state),
+                "_state": file_state
+            })
+
+    entries.sort(key=lambda entry: entry["name"])
+    _image_directories[path] = {"mtime": directory_mtime, "entries": entries}
+    return entries
 
 @app.route('/images/<path:filename>')
 def serve_image(filename):
-    return send_from_directory(images_folder, filename.strip())
+    filename = filename.strip()
+    size, error = _requested_image_size()
+    if error:
+        return jsonify({"error": error}), 400
+
+    if size is not None and Image is not None:
+        derivative_path, derivative_etag = _image_derivative(filename, *size)
+        if derivative_path is not None:
+            mimetype = mimetypes.guess_type(derivative_path)[0]
+            response = send_file(derivative_path, mimetype=mimetype, etag=derivative_etag, max_age=IMAGE_MAX_AGE)
+            response.cache_control.public = False
+            return _set_cache_headers(response, IMAGE_MAX_AGE)
+
+    etag = _image_etag(filename)
+    response = send_from_directory(images_folder, filename, etag=etag if etag else True, max_age=IMAGE_MAX_AGE)
+    response.cache_control.public = False
+    return _set_cache_headers(response, IMAGE_MAX_AGE)
 
 @app.route('/website/<path:url>')
 def get_website_page(url):
-    for site_url, site_data in WEBSITES_DATA.items():
-        if site_url.endswith(url):
-            data = {
-                "url": site_url,
-                "tags": site_data["tags"],
-                "content": site_data["content"],
-                "source_code": site_data["source_code"]
-            }
-            return jsonify(data)
-
-    for site_url, site_data in WIKI_DATA.items():
-        if site_url.endswith(url):
-            data = {
-                "url": site_url,
-                "tags": site_data["tags"],
-                "content": site_data["content"],
-                "source_code": site_data["source_code"]
-            }
-            return jsonify(data)
+    if COORDINATOR_MODE:
+        return _coordinated_page("/website/", url)
+
+    snapshot = SNAPSHOT
+    site_url, site_data = _resolve_url(snapshot, url)
+    if site_data is not None:
+        return _shard_page_response(snapshot, site_url, _page_response(site_data.website_body, site_data.website_gzip, site_data.website_etag))
 
     return jsonify({"error": "Website not found"}), 404
 
 @app.route('/search/', defaults={'search_terms': ''})
 @app.route('/search/<search_terms>')
 def search_api(search_terms):
-    terms = search_terms.split()
-    if not search_terms:
-        results = [{"url": url, "content": data["content"]} for url, data in WEBSITES_DATA.items()]
-    else:
-        scores = {url: 0 for url in WEBSITES_DATA}
-        for url, data in WEBSITES_DATA.items():
-            _search_for_tags(terms, data["tags"], url, scores)
-            _search_for_content(terms, data["content_words"], url, scores)
+    if COORDINATOR_MODE:
+        return _coordinated_search_response("websites", search_terms)
 
-        sorted_scores = sorted(scores.items(), key=lambda item: item[1], reverse=True)
-        results = [{"url": url, "content": WEBSITES_DATA[url]["content"]} for url, score in sorted_scores if score > 0]
-    
-    return jsonify(results)
+    corpus_stats, error = _request_corpus_stats()
+    if error:
+        return jsonify({"error": error}), 400
+
+    snapshot = SNAPSHOT
+    stream = _wants_stream()
+    etag = _search_etag(snapshot, stream)
+    not_modified = _not_modified(etag, SEARCH_MAX_AGE, weak=True)
+    if not_modified is not None:
+        return not_modified
+
+    results, total = _cached_search(snapshot, "websites", search_terms, stream, corpus_stats)
+    return _search_response(results, total, etag, stream)
 
 @app.route('/wiki_search/', defaults={'wiki_term': ''})
 @app.route('/wiki_search/<wiki_term>')
 def wiki_search_api(wiki_term):
-    terms = wiki_term.split()
-    if not wiki_term:
-        results = [{"url": url, "content": data["content"]} for url, data in WIKI_DATA.items()]
-    else:
-        scores = {url: 0 for url in WIKI_DATA}
-        for url, data in WIKI_DATA.items():
-            _search_for_tags(terms, data["tags"], url, scores)
-            _search_for_content(terms, data["content_words"], url, scores)
-        
-        sorted_scores = sorted(scores.items(), key=lambda item: item[1], reverse=True)
-        results = [{"url": url, "content": WIKI_DATA[url]["content"]} for url, score in sorted_scores if score > 0]
-        
-    if results:
-        return jsonify(results)
+    if COORDINATOR_MODE:
+        return _coordinated_search_response("wiki", wiki_term)
+
+    corpus_stats, error = _request_corpus_stats()
+    if error:
+        return jsonify({"error": error}), 400
+
+    snapshot = SNAPSHOT
+    stream = _wants_stream()
+    etag = _search_etag(snapshot, stream)
+    not_modified = _not_modified(etag, SEARCH_MAX_AGE, weak=True)
+    if not_modified is not None:
+        return not_modified
+
+    results, total = _cached_search(snapshot, "wiki", wiki_term, stream, corpus_stats)
+    if total:
+        return _search_response(results, total, etag, stream)
     else:
         return jsonify(), 404
 
+@app.route('/suggest/<prefix>')
+def suggest_api(prefix):
+    limit = min(request.args.get("limit", default=SUGGEST_LIMIT, type=int), SUGGEST_LIMIT)
+    prefix = prefix.strip().lower()
+    if COORDINATOR_MODE:
+        return jsonify([term for term, frequency in _coordinated_suggestions(prefix, limit)])
+
+    snapshot = SNAPSHOT
+    etag = _search_etag(snapshot)
+    not_modified = _not_modified(etag, SEARCH_MAX_AGE, weak=True)
+    if not_modified is not None:
+        return not_modified
+
+    suggestions = _suggest_terms(snapshot["suggest"], prefix, limit)
+    if request.args.get("frequencies") == "1":
+        response = jsonify(suggestions)
+    else:
+        response = jsonify([term for term, frequency in suggestions])
+    return _set_cache_headers(response, SEARCH_MAX_AGE, etag, weak=True)
+
+@app.route('/corpus_stats/<name>/', defaults={'search_terms': ''})
+@app.route('/corpus_stats/<name>/<search_terms>')
+def corpus_stats_api(name, search_terms):
+    if name not in ("websites", "wiki") or COORDINATOR_MODE:
+        return jsonify({"error": "Unknown collection"}), 404
+    return jsonify(_corpus_stats(SNAPSHOT[name]["index"], search_terms.split()))
+
 @app.route('/list_images/<path:directory>')
 def list_images(directory):
-    path = os.path.join(images_folder, directory.strip())
-    if not os.path.isdir(path):
+    path = safe_join(images_folder, directory.strip())
+    if path is None or not os.path.isdir(path):
         return jsonify({"error": "Directory not found"}), 404
-    
-    files = [f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))]
-    return jsonify(files)
+
+    entries = _image_directory_entries(path)
+    limit, offset = _get_paging_params()
+    end = None if limit is None else offset + limit
+    files = [
+        {key: value for key, value in entry.items() if not key.startswith("_")}
+        for entry in entries[offset:end]
+    ]
+    response = jsonify(files)
+    response.headers["X-Total-Count"] = str(len(entries))
+    return response
+
+@app.route('/metrics')
+def metrics_api():
+    with _metrics_lock:
+        routes = {
+            route: {
+                "requests": route_metrics["requests"],
+                "unauthorized": route_metrics["unauthorized"],
+                "server_errors": route_metrics["server_errors"],
+                "status": {str(code): count for code, count in route_metrics["status"].items()},
+                "latency_ms": _histogram(route_metrics["latency_ms"], LATENCY_BUCKETS_MS),
+                "response_bytes": _histogram(route_metrics["response_bytes"], RESPONSE_SIZE_BUCKETS)
+            }
+            for route, route_metrics in _metrics["routes"].items()
+        }
+        dropped_log_lines = _metrics["dropped_log_lines"]
+        shards = {shard_url: dict(shard) for shard_url, shard in _metrics["shards"].items()}
+        image_errors = dict(_metrics["image_errors"])
+    with _query_cache_lock:
+        query_cache = dict(_query_cache_stats, entries=len(_query_cache), capacity=QUERY_CACHE_SIZE)
+    admission = {
+        "global": _admission_gate.stats() if _admission_gate is not None else None,
+        "routes": {route: gate.stats() for route, gate in _route_gates.items()},
+        "rate_limits": {kind: limiter.stats() for kind, limiter in _rate_limiters.items()}
+    }
+
+    return jsonify({
+        "pid": os.getpid(),
+        "uptime": time.time() - _metrics["started"],
+        "generation": SNAPSHOT["generation"],
+        "dropped_log_lines": dropped_log_lines,
+        "query_cache": query_cache,
+        "admission": admission,
+        "shards": shards,
+        "image_errors": image_errors,
+        "routes": routes
+    })
+
+@app.route('/reload', methods=['POST'])
+def reload_api():
+    if COORDINATOR_MODE:
+        responses = _fan_out("/reload", method="POST")
+        shards = [response.json() if response is not None else None for response in responses]
+        changed = sum(shard["changed"] for shard in shards if shard is not None)
+        return jsonify({"shards": shards, "changed": changed})
+
+    changed = reload_data()
+    return jsonify({"generation": SNAPSHOT["generation"], "changed": changed})
+
+def _batch_subrequest(path):
+    if not isinstance(path, str) or not path.startswith(BATCH_PREFIXES):
+        return 400, _dump_json({"error": "Unsupported sub-request"})
+
+    with app.test_request_context(path):
+        if request.routing_exception is not None:
+            return 404, _dump_json({"error": "Not found"})
+        response = app.make_response(app.view_functions[request.url_rule.endpoint](**request.view_args))
+        if response.mimetype != "application/json":
+            return 400, _dump_json({"error": "Unsupported sub-request"})
+        return response.status_code, response.get_data().strip() or b"null"
+
+@app.route('/batch', methods=['POST'])
+def batch_api():
+    payload = request.get_json(silent=True)
+    paths = payload.get("requests") if isinstance(payload, dict) else None
+    if not isinstance(paths, list):
+        return jsonify({"error": "Expected a JSON object with a \"requests\" list"}), 400
+    if len(paths) > BATCH_MAX_REQUESTS:
+        return jsonify({"error": f"At most {BATCH_MAX_REQUESTS} requests per batch"}), 413
+
+    parts = []
+    for path in paths:
+        status, body = _batch_subrequest(path)
+        parts.append(b'{"body":' + body + b',"path":' + _dump_json(path) + b',"status":' + str(status).encode() + b"}")
+    return Response(b"[" + b",".join(parts) + b"]", mimetype="application/json")
 
 @app.route('/raw/<path:url>')
 def get_raw_json(url):
-    for dataset in (WEBSITES_DATA, WIKI_DATA):
-        for site_url, site_data in dataset.items():
-            if site_url.endswith(url):
-                return jsonify(site_data)
+    if COORDINATOR_MODE:
+        return _coordinated_page("/raw/", url)
+
+    snapshot = SNAPSHOT
+    site_url, site_data = _resolve_url(snapshot, url)
+    if site_data is not None:
+        return _shard_page_response(snapshot, site_url, _page_response(None, site_data.raw_gzip, site_data.raw_etag))
     return jsonify({"error": "Website not found"}), 404
 
+def run_production_server():
+    expensive_slots = [ROUTE_CONCURRENCY.get(route, 0) for route in EXPENSIVE_ROUTES]
+    if not all(expensive_slots) or sum(expensive_slots) >= PRODUCTION_THREADS:
+        print(
+            f"Production mode needs admission limits for {', '.join(EXPENSIVE_ROUTES)} that add up to less than "
+            f"production.threads ({PRODUCTION_THREADS}), or searches can occupy every worker thread"
+        )
+        sys.exit(1)
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("Production mode requires gunicorn: pip install gunicorn")
+        sys.exit(1)
+
+    production_config = config.get("production", {})
+    options = {
+        "bind": production_config.get("bind", f"0.0.0.0:{PORT}"),
+        "workers": production_config.get("workers", (os.cpu_count() or 1) * 2 + 1),
+        "worker_class": "gthread",
+        "threads": PRODUCTION_THREADS,
+        "keepalive": production_config.get("keepalive", 5),
+        "timeout": production_config.get("timeout", 30),
+        "graceful_timeout": production_config.get("graceful_timeout", 30),
+        "max_requests": production_config.get("max_requests", 0),
+        "max_requests_jitter": production_config.get("max_requests_jitter", 0),
+        "post_fork": lambda arbiter, worker: start_background_threads(),
+    }
+
+    class ProductionApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    gc.freeze()
+    ProductionApplication().run()
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    if PRODUCTION_MODE:
+        run_production_server()
+    else:
+        app.run(host='0.0.0.0', port=PORT, debug=DEBUG)
@@ -0,0 +1,48 @@
+import os
+import json
+import shutil
+import struct
+import zlib
+import importlib.util
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_KEY = "test-key"
+
+def write_page(folder, filename, url, content, tags=(), source_code="<html></html>"):
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, filename), "w") as f:
+        json.dump({"url": url, "content": content, "tags": list(tags), "source_code": source_code}, f)
+
+def write_png(path, width, height):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    pixels = b"".join(b"\0" + b"\x80\x40\x20" * width for _ in range(height))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(pixels)) + chunk(b"IEND", b""))
+
+@pytest.fixture
+def load_server(tmp_path):
+    loaded = []
+
+    def load(**config):
+        os.makedirs(tmp_path / "websites" / "maxipedia", exist_ok=True)
+        os.makedirs(tmp_path / "images", exist_ok=True)
+        with open(tmp_path / "server_config.json", "w") as f:
+            json.dump({"key": API_KEY, "access_log": "", **config}, f)
+        shutil.copy(os.path.join(REPO_ROOT, "server.py"), tmp_path / "server.py")
+
+        spec = importlib.util.spec_from_file_location(f"server_under_test_{len(loaded)}", tmp_path / "server.py")
+        server = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(server)
+        server.app.testing = True
+        loaded.append(server)
+        return server
+
+    return load
+
+@pytest.fixture
+def api_headers():
+    return {"X-API-Key": API_KEY}
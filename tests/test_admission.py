@@ -0,0 +1,56 @@
+import sys
+import subprocess
+import pytest
+from flask import jsonify
+from conftest import write_page, write_png
+
+@pytest.fixture
+def server(tmp_path, load_server):
+    write_page(tmp_path / "websites", "alpha.json", "https://alpha.example", "cats", [])
+    write_png(tmp_path / "images" / "cat.png", 8, 6)
+    return load_server()
+
+def _active(server):
+    return server._admission_gate.stats()["active"], server._route_gates["/batch"].stats()["active"]
+
+def test_batch_holds_its_admission_slots_while_sub_requests_run(server, api_headers, monkeypatch):
+    seen = []
+
+    def recording_view(url):
+        seen.append(_active(server))
+        return jsonify({"url": url})
+
+    monkeypatch.setitem(server.app.view_functions, "get_website_page", recording_view)
+    paths = ["/website/alpha.example", "/website/beta.example", "/website/gamma.example"]
+    response = server.app.test_client().post("/batch", json={"requests": paths}, headers=api_headers)
+
+    assert response.status_code == 200
+    assert seen == [(1, 1)] * len(paths)
+    assert _active(server) == (0, 0)
+
+def test_admission_slots_are_released_after_each_request(server, api_headers):
+    client = server.app.test_client()
+    paths = (
+        "/website/alpha.example", "/search/cats", "/search/cats?stream=1", "/raw/missing.example",
+        "/images/cat.png", "/images/cat.png?width=4", "/images/cat.png?width=4", "/images/missing.png"
+    )
+    for path in paths:
+        response = client.get(path, headers=api_headers)
+        response.close()
+        assert server._admission_gate.stats()["active"] == 0
+    assert all(gate.stats()["active"] == 0 for gate in server._route_gates.values())
+
+@pytest.mark.parametrize("production, routes", [
+    ({"threads": 2}, {}),
+    ({}, {"/search": 4}),
+    ({"threads": 8}, {"/search": 3, "/wiki_search": 3, "/batch": 2}),
+    ({}, {"/wiki_search": 0}),
+])
+def test_production_mode_rejects_limits_that_let_searches_take_every_thread(tmp_path, load_server, production, routes):
+    load_server(production=production, admission={"routes": routes})
+    completed = subprocess.run(
+        [sys.executable, str(tmp_path / "server.py"), "--production"],
+        cwd=tmp_path, capture_output=True, text=True, timeout=60
+    )
+    assert completed.returncode == 1
+    assert "add up to less than production.threads" in completed.stdout
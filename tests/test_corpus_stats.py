@@ -0,0 +1,47 @@
+import json
+import pytest
+from conftest import write_page
+
+@pytest.fixture
+def server(tmp_path, load_server):
+    write_page(tmp_path / "websites", "alpha.json", "https://alpha.example", "cats and dogs", ["pets"])
+    write_page(tmp_path / "websites", "beta.json", "https://beta.example", "dogs bark at cats and cats", [])
+    write_page(tmp_path / "websites" / "maxipedia", "cat.json", "https://maxipedia.example/cat", "the cat", ["cat"])
+    return load_server()
+
+@pytest.mark.parametrize("header", [
+    "not json",
+    "[]",
+    "{}",
+    '{"doc_count": 2}',
+    '{"doc_count": "2", "total_lengths": {"tags": 1, "content": 8}, "document_frequencies": {"tags": {}, "content": {}}}',
+    '{"doc_count": 2, "total_lengths": {"tags": 1}, "document_frequencies": {"tags": {}, "content": {}}}',
+    '{"doc_count": 2, "total_lengths": {"tags": 1, "content": 8}, "document_frequencies": {"tags": [], "content": {}}}',
+    '{"doc_count": 2, "total_lengths": {"tags": 1, "content": 8}, "document_frequencies": {"tags": {}, "content": {"cats": -1}}}',
+    '{"doc_count": true, "total_lengths": {"tags": 1, "content": 8}, "document_frequencies": {"tags": {}, "content": {}}}',
+])
+@pytest.mark.parametrize("route", ["search", "wiki_search"])
+def test_malformed_corpus_stats_are_rejected(server, api_headers, route, header):
+    response = server.app.test_client().get(f"/{route}/cats?rank=bm25", headers=dict(api_headers, **{"X-Corpus-Stats": header}))
+    assert response.status_code == 400
+    assert "X-Corpus-Stats" in response.get_json()["error"]
+
+def test_corpus_stats_from_the_same_corpus_give_local_scores(server, api_headers):
+    client = server.app.test_client()
+    stats = client.get("/corpus_stats/websites/cats dogs", headers=api_headers).get_json()
+    local = client.get("/search/cats dogs?rank=bm25&scores=1", headers=api_headers)
+    shared = client.get("/search/cats dogs?rank=bm25&scores=1", headers=dict(api_headers, **{"X-Corpus-Stats": json.dumps(stats)}))
+    assert shared.status_code == 200
+    assert shared.get_json() == local.get_json()
+
+def test_shard_failures_are_counted_in_metrics(tmp_path, load_server, api_headers, capsys):
+    server = load_server(shards=["http://127.0.0.1:9"], shard_timeout=0.5)
+    capsys.readouterr()
+    client = server.app.test_client()
+    for _ in range(2):
+        assert client.get("/search/cats", headers=api_headers).status_code == 503
+
+    assert capsys.readouterr().out == ""
+    shard = client.get("/metrics", headers=api_headers).get_json()["shards"]["http://127.0.0.1:9"]
+    assert shard["errors"] + shard["timeouts"] == 2
+    assert shard["last_error"].startswith("/search/cats: ")
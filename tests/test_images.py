@@ -0,0 +1,42 @@
+import struct
+import zlib
+import pytest
+
+def _png_header(width, height):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(b"")) + chunk(b"IEND", b"")
+
+@pytest.fixture
+def server(tmp_path, load_server):
+    pytest.importorskip("PIL")
+    folder = tmp_path / "images" / "cats"
+    folder.mkdir(parents=True)
+    (folder / "bomb.png").write_bytes(_png_header(14000, 14000))
+    (folder / "small.png").write_bytes(_png_header(4, 3))
+    return load_server()
+
+def test_list_images_reports_null_dimensions_for_decompression_bombs(server, api_headers):
+    response = server.app.test_client().get("/list_images/cats", headers=api_headers)
+    assert response.status_code == 200
+    dimensions = {entry["name"]: (entry["width"], entry["height"]) for entry in response.get_json()}
+    assert dimensions == {"bomb.png": (None, None), "small.png": (4, 3)}
+
+@pytest.mark.filterwarnings("ignore:Image size")
+@pytest.mark.parametrize("size", [(14000, 14000), (10000, 10000)])
+def test_oversized_images_are_served_without_resizing(server, tmp_path, api_headers, monkeypatch, size):
+    original = _png_header(*size)
+    (tmp_path / "images" / "cats" / "large.png").write_bytes(original)
+    monkeypatch.setattr(server._image_executor, "submit", lambda *args: pytest.fail("resize job submitted"))
+
+    response = server.app.test_client().get("/images/cats/large.png?width=100", headers=api_headers)
+    assert response.status_code == 200
+    assert response.data == original
+
+def test_decompression_bomb_raised_by_resize_falls_back_to_original(server, tmp_path, api_headers, monkeypatch):
+    monkeypatch.setattr(server, "_image_dimensions", lambda filepath: (4, 3))
+    response = server.app.test_client().get("/images/cats/bomb.png?width=2", headers=api_headers)
+    assert response.status_code == 200
+    assert response.data == (tmp_path / "images" / "cats" / "bomb.png").read_bytes()
+    assert server._metrics["image_errors"]["count"] == 1
@@ -0,0 +1,49 @@
+import gzip
+import pytest
+from conftest import write_page
+
+CONTENT = "Hello, World! " * 50
+
+@pytest.fixture
+def server(tmp_path, load_server):
+    write_page(tmp_path / "websites", "hello.json", "https://hello.example", CONTENT, ["Greeting"], {"markup": "<p>hi</p>"})
+    return load_server()
+
+@pytest.mark.parametrize("route", ["website", "raw"])
+def test_gzip_variant_matches_identity_body(server, api_headers, route):
+    client = server.app.test_client()
+    plain = client.get(f"/{route}/hello.example", headers=dict(api_headers, **{"Accept-Encoding": "identity"}))
+    compressed = client.get(f"/{route}/hello.example", headers=dict(api_headers, **{"Accept-Encoding": "gzip"}))
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.data) == plain.data
+    assert plain.headers["Vary"] == compressed.headers["Vary"] == "Accept-Encoding"
+
+    revalidated = client.get(f"/{route}/hello.example", headers=dict(api_headers, **{"If-None-Match": plain.headers["ETag"]}))
+    assert revalidated.status_code == 304
+
+def test_page_bodies(server, api_headers):
+    client = server.app.test_client()
+    assert client.get("/website/hello.example", headers=api_headers).get_json() == {
+        "url": "https://hello.example",
+        "tags": ["greeting"],
+        "content": CONTENT,
+        "source_code": {"markup": "<p>hi</p>"}
+    }
+    assert client.get("/raw/hello.example", headers=api_headers).get_json() == {
+        "tags": ["greeting"],
+        "content_words": ["hello", "world"] * 50,
+        "content": CONTENT,
+        "source_code": {"markup": "<p>hi</p>"}
+    }
+
+def test_page_hits_do_not_modify_page_records(server, api_headers):
+    page = server.SNAPSHOT["websites"]["data"]["https://hello.example"]
+    before = [getattr(page, slot) for slot in page.__slots__]
+    assert page.website_gzip and page.raw_gzip
+
+    client = server.app.test_client()
+    for route in ("website", "raw"):
+        for encoding in ("identity", "gzip"):
+            client.get(f"/{route}/hello.example", headers=dict(api_headers, **{"Accept-Encoding": encoding}))
+    assert [getattr(page, slot) for slot in page.__slots__] == before
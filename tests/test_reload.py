@@ -0,0 +1,39 @@
+import os
+import pytest
+from conftest import write_page
+
+@pytest.fixture
+def corpus(tmp_path):
+    write_page(tmp_path / "websites", "a.json", "https://a.example", "alpha page", [])
+    write_page(tmp_path / "websites", "b.json", "https://b.example", "first copy", [])
+    write_page(tmp_path / "websites", "dup.json", "https://b.example", "second copy", [])
+    return tmp_path
+
+def _page(server, api_headers, url):
+    response = server.app.test_client().get(f"/website/{url}", headers=api_headers)
+    return response.status_code, response.get_json()
+
+def _owner(server, url):
+    return next(
+        os.path.basename(filepath) for filepath, entry in server.SNAPSHOT["websites"]["files"].items()
+        if entry["page"] is server.SNAPSHOT["websites"]["data"][url]
+    )
+
+@pytest.mark.parametrize("change", ["delete", "edit"])
+@pytest.mark.parametrize("target", ["winner", "loser"])
+def test_reload_matches_cold_start_for_duplicate_urls(corpus, load_server, api_headers, change, target):
+    server = load_server(snapshot_path="")
+    winner = _owner(server, "https://b.example")
+    filename = winner if target == "winner" else ({"b.json", "dup.json"} - {winner}).pop()
+    if change == "delete":
+        os.remove(corpus / "websites" / filename)
+    else:
+        write_page(corpus / "websites", filename, "https://c.example", "moved away", [])
+    server.reload_data()
+
+    cold = load_server(snapshot_path="")
+    for url in ("b.example", "c.example", "a.example"):
+        assert _page(server, api_headers, url) == _page(cold, api_headers, url)
+    for query in ("copy", "moved", "first second"):
+        response = server.app.test_client().get(f"/search/{query}?scores=1", headers=api_headers)
+        assert response.get_json() == cold.app.test_client().get(f"/search/{query}?scores=1", headers=api_headers).get_json()
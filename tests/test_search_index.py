@@ -0,0 +1,105 @@
+import os
+import re
+import json
+import pytest
+from conftest import write_page
+
+PAGES = [
+    ("alpha.json", "https://alpha.example", "Cats and dogs. Cats sleep all day!", ["Cats", "pets"]),
+    ("beta.json", "https://beta.example", "Dogs bark at the mail carrier.", ["dogs"]),
+    ("gamma.json", "https://gamma.example", "Nothing about animals, only weather.", ["weather"]),
+    ("delta.json", "https://delta.example", "A cat, a dog, and a bird.", []),
+    ("epsilon.json", "https://epsilon.example", "Weather for cats: sunny. Dogs? Rainy.", ["pets", "weather"]),
+    ("zeta.json", "https://zeta.example", "It's raining cats & dogs", ["idioms"]),
+]
+WIKI_PAGES = [
+    ("cat.json", "https://maxipedia.example/cat", "The cat is a small domesticated carnivorous mammal.", ["cat", "mammal"]),
+    ("dog.json", "https://maxipedia.example/dog", "The dog is a domesticated descendant of the wolf.", ["dog", "mammal"]),
+    ("wolf.json", "https://maxipedia.example/wolf", "The wolf is a large canine. Wolf packs hunt.", ["wolf"]),
+]
+QUERIES = [
+    "cats", "dogs", "cats dogs", "Cats DOGS", "pets", "weather cats", "mammal",
+    "wolf wolf", "cat dog mammal", "domesticated", "its", "unknownword", "cats cats pets",
+]
+
+def _search_for_tags(search_terms, tags, url, scores):
+    normalized_search_terms = [term.lower() for term in search_terms]
+    for term in normalized_search_terms:
+        if term in tags:
+            scores[url] += 1
+
+def _search_for_content(search_terms, content_words, url, scores):
+    normalized_search_terms = [term.lower() for term in search_terms]
+    for term in normalized_search_terms:
+        if term in content_words:
+            scores[url] += 1
+
+def _load_scan_dataset(folder):
+    dataset = {}
+    for filename in os.listdir(folder):
+        filepath = os.path.join(folder, filename)
+        if os.path.isfile(filepath):
+            with open(filepath) as f:
+                page = json.load(f)
+            dataset[page["url"]] = {
+                "tags": [tag.lower() for tag in page.get("tags", [])],
+                "content_words": re.sub(r'[^\w\s]', '', page.get("content", "").lower()).split()
+            }
+    return dataset
+
+def _scan(dataset, query):
+    terms = query.split()
+    if not query:
+        return [(url, None) for url in dataset]
+    scores = {url: 0 for url in dataset}
+    for url, data in dataset.items():
+        _search_for_tags(terms, data["tags"], url, scores)
+        _search_for_content(terms, data["content_words"], url, scores)
+    sorted_scores = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(url, score) for url, score in sorted_scores if score > 0]
+
+@pytest.fixture
+def corpus(tmp_path, load_server):
+    for filename, url, content, tags in PAGES:
+        write_page(tmp_path / "websites", filename, url, content, tags)
+    for filename, url, content, tags in WIKI_PAGES:
+        write_page(tmp_path / "websites" / "maxipedia", filename, url, content, tags)
+    server = load_server()
+    return server, {
+        "search": _load_scan_dataset(tmp_path / "websites"),
+        "wiki_search": _load_scan_dataset(tmp_path / "websites" / "maxipedia"),
+    }
+
+@pytest.mark.parametrize("route", ["search", "wiki_search"])
+@pytest.mark.parametrize("query", QUERIES + [""])
+def test_index_matches_scan(corpus, api_headers, route, query):
+    server, datasets = corpus
+    expected = _scan(datasets[route], query)
+    client = server.app.test_client()
+
+    response = client.get(f"/{route}/{query}?scores=1", headers=api_headers)
+    if route == "wiki_search" and not expected:
+        assert response.status_code == 404
+        return
+    assert response.status_code == 200
+    results = response.get_json()
+    assert [(result["url"], result.get("score")) for result in results] == expected
+    assert response.headers["X-Total-Count"] == str(len(expected))
+
+    response = client.get(f"/{route}/{query}", headers=api_headers)
+    assert [result["url"] for result in response.get_json()] == [url for url, score in expected]
+
+@pytest.mark.parametrize("query", ["cats dogs", "weather"])
+def test_index_matches_scan_after_reload(corpus, tmp_path, api_headers, query):
+    server, datasets = corpus
+    write_page(tmp_path / "websites", "beta.json", "https://beta.example", "Weather dogs cats", ["cats"])
+    os.remove(tmp_path / "websites" / "gamma.json")
+    write_page(tmp_path / "websites", "eta.json", "https://eta.example", "cats weather", [])
+    server.reload_data()
+
+    dataset = dict(datasets["search"])
+    del dataset["https://gamma.example"]
+    dataset.update(_load_scan_dataset(tmp_path / "websites"))
+    expected = _scan(dataset, query)
+    response = server.app.test_client().get(f"/search/{query}?scores=1", headers=api_headers)
+    assert [(result["url"], result["score"]) for result in response.get_json()] == expected
@@ -0,0 +1,68 @@
+import os
+import pytest
+from conftest import write_page
+
+QUERIES = ["cats", "dogs cats", "weather", "mammal"]
+PAGES = ["alpha.example", "beta.example", "maxipedia.example/cat"]
+
+@pytest.fixture
+def corpus(tmp_path):
+    write_page(tmp_path / "websites", "alpha.json", "https://alpha.example", "Cats and dogs. Cats sleep all day!", ["Cats", "pets"])
+    write_page(tmp_path / "websites", "beta.json", "https://beta.example", "Dogs bark, whatever the weather.", ["dogs"], None)
+    write_page(tmp_path / "websites" / "maxipedia", "cat.json", "https://maxipedia.example/cat", "The cat is a mammal.", ["cat", "mammal"])
+    return tmp_path
+
+def _responses(server, api_headers):
+    client = server.app.test_client()
+    responses = {}
+    for query in QUERIES:
+        for route in ("search", "wiki_search"):
+            for rank in ("", "bm25"):
+                response = client.get(f"/{route}/{query}?scores=1&rank={rank}", headers=api_headers)
+                responses[route, query, rank] = (response.status_code, response.get_json())
+    for url in PAGES:
+        for route in ("website", "raw"):
+            response = client.get(f"/{route}/{url}", headers=api_headers)
+            responses[route, url] = (response.status_code, response.data, response.headers.get("ETag"))
+    responses["suggest"] = client.get("/suggest/c?frequencies=1", headers=api_headers).get_json()
+    return responses
+
+def test_snapshot_round_trip(corpus, load_server, api_headers, capsys):
+    parsed = load_server()
+    assert os.path.exists(corpus / "corpus.snapshot")
+    capsys.readouterr()
+
+    restored = load_server()
+    assert "Loaded corpus snapshot" in capsys.readouterr().out
+    assert restored.TERMS == parsed.TERMS
+    assert _responses(restored, api_headers) == _responses(parsed, api_headers)
+    for name in ("websites", "wiki"):
+        assert restored.SNAPSHOT[name]["index"] == parsed.SNAPSHOT[name]["index"]
+        assert restored.SNAPSHOT[name]["url_index"] == parsed.SNAPSHOT[name]["url_index"]
+
+def test_snapshot_reload_after_restore(corpus, load_server, api_headers):
+    load_server()
+    restored = load_server()
+    write_page(corpus / "websites", "gamma.json", "https://gamma.example", "More cats", [])
+    os.remove(corpus / "websites" / "beta.json")
+    assert restored.reload_data() == 2
+
+    os.remove(corpus / "corpus.snapshot")
+    reparsed = load_server()
+    assert _responses(restored, api_headers) == _responses(reparsed, api_headers)
+
+@pytest.mark.parametrize("damage", ["truncate", "garbage"])
+def test_damaged_snapshot_is_ignored(corpus, load_server, api_headers, capsys, damage):
+    parsed = load_server()
+    expected = _responses(parsed, api_headers)
+    snapshot_path = corpus / "corpus.snapshot"
+    data = snapshot_path.read_bytes()
+    if damage == "truncate":
+        snapshot_path.write_bytes(data[:len(data) // 2])
+    else:
+        snapshot_path.write_bytes(data[:40] + b"\xff" * (len(data) - 40))
+    capsys.readouterr()
+
+    restored = load_server()
+    assert "Ignoring corpus snapshot" in capsys.readouterr().out
+    assert _responses(restored, api_headers) == expected